@@ -22,16 +22,25 @@ from flask import jsonify, abort, request, make_response
 @app_views.route("/amenities", methods=["GET"])
 def list_amenities():
     """
-    Retrieves all Amenity objects from the storage.
+    Retrieves all Amenity objects from the storage, ordered by id.
+    With the query parameters limit (default 100) and/or after, only
+    returns the page of at most limit objects following the id after.
 
     Returns:
         A JSON list of dictionaries where each dictionary represents
-        a Amenity object.
+        a Amenity object, otherwise returns an error message with a status
+        code 400 if limit is not a positive integer.
     """
-    all = storage.all(Amenity)
+    if "limit" in request.args or "after" in request.args:
+        limit = request.args.get("limit", "100")
+        if not limit.isdigit() or int(limit) <= 0:
+            return make_response("Invalid limit", 400)
+        objs = storage.page(Amenity, request.args.get("after"), int(limit))
+    else:
+        objs = storage.iter(Amenity)
     return make_response(jsonify(
         [
-            obj.to_dict() for obj in all.values()
+            obj.to_dict() for obj in objs
         ]
     ), 200)
 
@@ -70,8 +79,9 @@ def delete_amenity(amenity_id):
     if not obj:
         abort(404)
 
-    obj.delete()
-    storage.save()
+    with storage.transaction():
+        obj.delete()
+        storage.save()
     return make_response(jsonify({}), 200)
 
 
@@ -91,14 +101,16 @@ def create_amenity():
         return make_response("Missing name", 400)
 
     newObj = Amenity(**params)
-    newObj.save()
+    with storage.transaction():
+        newObj.save()
     return make_response(jsonify(newObj.to_dict()), 201)
 
 
-@app_views.route("/amenities/<string:amenity_id>", methods=["PUT"])
+@app_views.route("/amenities/<string:amenity_id>", methods=["PUT", "PATCH"])
 def update_amenity(amenity_id):
     """
     Updates a specific Amenity object in the storage.
+    Only the attributes given change, in place; PATCH does the same.
 
     Args:
         amenity_id (str): The id of the Amenity object to update.
@@ -118,11 +130,6 @@ def update_amenity(amenity_id):
     params.pop("created_at", None)
     params.pop("updated_at", None)
 
-    updated_obj = obj.to_dict()
-    updated_obj.update(params)
-    new_obj = Amenity(**updated_obj)
+    storage.update(obj, params)
 
-    obj.delete()
-    new_obj.save()
-
-    return make_response(jsonify(new_obj.to_dict()), 200)
+    return make_response(jsonify(obj.to_dict()), 200)
@@ -79,8 +79,9 @@ def delete_city(city_id):
     obj = storage.get(City, city_id)
     if not obj:
         abort(404)
-    obj.delete()
-    storage.save()
+    with storage.transaction():
+        obj.delete()
+        storage.save()
     return make_response(jsonify({}), 200)
 
 
@@ -109,14 +110,16 @@ def create_city(state_id):
 
     params.update({"state_id": state_id})
     newObj = City(**params)
-    newObj.save()
+    with storage.transaction():
+        newObj.save()
     return make_response(jsonify(newObj.to_dict()), 201)
 
 
-@app_views.route("/cities/<string:city_id>", methods=["PUT"])
+@app_views.route("/cities/<string:city_id>", methods=["PUT", "PATCH"])
 def update_city(city_id):
     """
     Updates a specific City object in the storage.
+    Only the attributes given change, in place; PATCH does the same.
 
     Args:
         city_id (str): The id of the City object to update.
@@ -137,11 +140,6 @@ def update_city(city_id):
     params.pop("created_at", None)
     params.pop("updated_at", None)
 
-    updated_obj = obj.to_dict()
-    updated_obj.update(params)
-    new_obj = City(**updated_obj)
+    storage.update(obj, params)
 
-    obj.delete()
-    new_obj.save()
-
-    return make_response(jsonify(new_obj.to_dict()), 200)
+    return make_response(jsonify(obj.to_dict()), 200)
@@ -10,16 +10,20 @@ flask: This is the main Flask module.
 Routes:
 -------
 /status: This route returns the status of the application.
+/stats: This route returns the number of objects of each type.
+/pool: This route returns the state of the database connection pool.
 
 Functions:
 ----------
 status(): This function returns a JSON response with the status of
 the application.
+count(): This function returns a JSON response with the object counts.
+pool(): This function returns a JSON response with the pool statistics.
 """
 
 from api.v1.views import app_views
 from models import storage
-from flask import jsonify
+from flask import abort, jsonify
 from models.amenity import Amenity
 from models.city import City
 from models.place import Place
@@ -44,7 +48,8 @@ def status():
 def count():
     """
     This function is a route handler for the "/stats" endpoint.
-    It counts the number of instances for each object type in the storage.
+    It counts the number of instances for each object type in the storage,
+    all at once.
 
     The object types are: Amenity, City, Place, Review, State, and User.
 
@@ -61,7 +66,26 @@ def count():
         "users": User
         }
 
+    counts = storage.counts()
     obj_counts = {
-        key: storage.count(value) for key, value in objN.items()
+        key: counts[value.__name__] for key, value in objN.items()
         }
     return jsonify(obj_counts)
+
+
+@app_views.route("/pool")
+def pool():
+    """
+    This function is a route handler for the "/pool" endpoint.
+    It reports the connection pool of the database storage, to watch for
+    its exhaustion under load.
+
+    Returns:
+        A JSON object with the pool size, the connections checked in and
+        checked out, the overflow in use, the number of checkouts and the
+        total and longest seconds they waited for a connection, or a 404
+        error if the storage has no connection pool.
+    """
+    if not hasattr(storage, "pool_stats"):
+        abort(404)
+    return jsonify(storage.pool_stats())
@@ -16,11 +16,8 @@ Imports:
 
 from models.city import City
 from models.place import Place
-from models.state import State
-from models.amenity import Amenity
 from models import storage
 from api.v1.views import app_views
-from os import getenv
 from flask import jsonify, abort, request, make_response
 
 
@@ -82,8 +79,9 @@ def delete_place(place_id):
     obj = storage.get(Place, place_id)
     if not obj:
         abort(404)
-    obj.delete()
-    storage.save()
+    with storage.transaction():
+        obj.delete()
+        storage.save()
     return make_response(jsonify({}), 200)
 
 
@@ -122,14 +120,16 @@ def create_place(city_id):
 
     params.update({"city_id": city_id})
     newObj = Place(**params)
-    newObj.save()
+    with storage.transaction():
+        newObj.save()
     return make_response(jsonify(newObj.to_dict()), 201)
 
 
-@app_views.route("/places/<string:place_id>", methods=["PUT"])
+@app_views.route("/places/<string:place_id>", methods=["PUT", "PATCH"])
 def update_place(place_id):
     """
     Updates a specific Place object in the storage.
+    Only the attributes given change, in place; PATCH does the same.
 
     Args:
         place_id (str): The id of the Place object to update.
@@ -151,14 +151,9 @@ def update_place(place_id):
     params.pop("updated_at", None)
     params.pop("user_id", None)
 
-    updated_obj = obj.to_dict()
-    updated_obj.update(params)
-    new_obj = Place(**updated_obj)
+    storage.update(obj, params)
 
-    obj.delete()
-    new_obj.save()
-
-    return make_response(jsonify(new_obj.to_dict()), 200)
+    return make_response(jsonify(obj.to_dict()), 200)
 
 
 @app_views.route('/places_search', methods=["POST"])
@@ -172,10 +167,16 @@ def search_places():
     The value for each key should be a list of ids representing State,
     City, and Amenity objects respectively.
 
-    If the request body is empty, all Place objects are returned.
+    If the request body is empty, e.g. {} or [], all Place objects are
+    returned.
+    The places are those of the states and of the cities listed (all
+    places if none is), having all the amenities listed; the search is
+    done by the storage, in a single query in DB mode.
+    A value that is not a list, and the ids that are not strings, are
+    ignored.
 
-    If the request body is not a JSON, returns a JSON error message with
-    a status code 400.
+    If the request body is not a JSON object, returns a JSON error message
+    with a status code 400.
 
     Args:
         None
@@ -185,55 +186,16 @@ def search_places():
         object that matches the search criteria.
     """
     req_body = request.get_json(silent=True, cache=False)
-    if req_body is None:
+    if req_body is None or req_body and type(req_body) is not dict:
         return make_response("Not a JSON", 400)
 
-    all_places = []
-    if len(req_body) != 0:
-        states = req_body.get("states", [])
-        cities = req_body.get("cities", [])
-        amenities = req_body.get("amenities", [])
-
-        if len(states) != 0 and type(states) is list:
-            for state_id in states:
-                state_obj = storage.get(State, state_id)
-                if state_obj:
-                    for city in state_obj.cities:
-                        all_places.extend(city.places)
-        if len(cities) != 0 and type(cities) is list:
-            for city_id in cities:
-                city_obj = storage.get(City, city_id)
-                if city_obj:
-                    all_places.extend(city_obj.places)
-
-        all_places = set(all_places)
-        all_places = list(all_places)
-
-        if len(states) == 0 and len(cities) == 0:
-            all_places = storage.all(Place).values()
-
-        if len(amenities) != 0:
-            amenities = [
-                storage.get(Amenity, amenity_id) for amenity_id
-                in amenities if storage.get(Amenity, amenity_id)
-                ]
-
-            filtered_places = []
-            storage_t = getenv('HBNB_TYPE_STORAGE')
-            for place in all_places:
-                if storage_t == 'db':
-                    place_amenities = place.amenities
-                else:
-                    place_amenities = place.amenity_ids
-
-                for amenity in place_amenities:
-                    if amenity in amenities:
-                        filtered_places.append(place)
-                        break
-            del all_places
-            all_places = filtered_places
-    else:
-        all_places = storage.all(Place).values()
+    criteria = {}
+    for key in ("states", "cities", "amenities"):
+        ids = req_body.get(key, []) if req_body else []
+        if type(ids) is not list:
+            ids = []
+        criteria[key] = [id for id in ids if type(id) is str]
+    all_places = storage.search_places(**criteria)
 
     return make_response(jsonify(
         [
@@ -46,7 +46,7 @@ def list_amenities_in_place(place_id):
     all = place.amenities
     return make_response(jsonify(
         [
-            obj.to_dict() if db_type != 'file' else obj for obj in all
+            obj.to_dict() for obj in all
             ]
         ), 200)
 
@@ -79,8 +79,13 @@ def delete_amenity_of_place(place_id, amenity_id):
     if amenity_obj not in place_obj.amenities:
         abort(404)
 
-    amenity_obj.delete()
-    place_obj.save()
+    with storage.transaction():
+        if db_type == 'db':
+            place_obj.amenities.remove(amenity_obj)
+        else:
+            place_obj.amenity_ids = [id for id in place_obj.amenity_ids
+                                     if id != amenity_id]
+        place_obj.save()
     return make_response(jsonify({}), 200)
 
 
@@ -112,6 +117,10 @@ def link_amenity_to_place(place_id, amenity_id):
     if amenity_obj in place_obj.amenities:
         return make_response(jsonify(amenity_obj.to_dict()), 200)
 
-    place_obj.amenities.append(amenity_obj)
-    place_obj.save()
+    with storage.transaction():
+        if db_type == 'db':
+            place_obj.amenities.append(amenity_obj)
+        else:
+            place_obj.amenities = amenity_obj
+        place_obj.save()
     return make_response(jsonify(amenity_obj.to_dict()), 201)
@@ -80,8 +80,9 @@ def delete_review(review_id):
     obj = storage.get(Review, review_id)
     if not obj:
         abort(404)
-    obj.delete()
-    storage.save()
+    with storage.transaction():
+        obj.delete()
+        storage.save()
     return make_response(jsonify({}), 200)
 
 
@@ -120,14 +121,16 @@ def create_review(place_id):
 
     params.update({"place_id": place_id})
     newObj = Review(**params)
-    newObj.save()
+    with storage.transaction():
+        newObj.save()
     return make_response(jsonify(newObj.to_dict()), 201)
 
 
-@app_views.route("/reviews/<string:review_id>", methods=["PUT"])
+@app_views.route("/reviews/<string:review_id>", methods=["PUT", "PATCH"])
 def update_review(review_id):
     """
     Updates a specific Review object in the storage.
+    Only the attributes given change, in place; PATCH does the same.
 
     Args:
         review_id (str): The id of the Review object to update.
@@ -149,11 +152,6 @@ def update_review(review_id):
     params.pop("user_id", None)
     params.pop("place_id", None)
 
-    updated_obj = obj.to_dict()
-    updated_obj.update(params)
-    new_obj = Review(**updated_obj)
+    storage.update(obj, params)
 
-    obj.delete()
-    new_obj.save()
-
-    return make_response(jsonify(new_obj.to_dict()), 200)
+    return make_response(jsonify(obj.to_dict()), 200)
@@ -22,16 +22,25 @@ from flask import jsonify, abort, request, make_response
 @app_views.route("/users", methods=["GET"])
 def list_users():
     """
-    Retrieves all User objects from the storage.
+    Retrieves all User objects from the storage, ordered by id.
+    With the query parameters limit (default 100) and/or after, only
+    returns the page of at most limit objects following the id after.
 
     Returns:
         A JSON list of dictionaries where each dictionary represents
-        a User object.
+        a User object, otherwise returns an error message with a status
+        code 400 if limit is not a positive integer.
     """
-    all = storage.all(User)
+    if "limit" in request.args or "after" in request.args:
+        limit = request.args.get("limit", "100")
+        if not limit.isdigit() or int(limit) <= 0:
+            return make_response("Invalid limit", 400)
+        objs = storage.page(User, request.args.get("after"), int(limit))
+    else:
+        objs = storage.iter(User)
     return make_response(jsonify(
         [
-            obj.to_dict() for obj in all.values()
+            obj.to_dict() for obj in objs
         ]
     ), 200)
 
@@ -70,8 +79,9 @@ def delete_user(user_id):
     if not obj:
         abort(404)
 
-    obj.delete()
-    storage.save()
+    with storage.transaction():
+        obj.delete()
+        storage.save()
     return make_response(jsonify({}), 200)
 
 
@@ -93,14 +103,16 @@ def create_user():
         return make_response("Missing password", 400)
 
     newObj = User(**params)
-    newObj.save()
+    with storage.transaction():
+        newObj.save()
     return make_response(jsonify(newObj.to_dict()), 201)
 
 
-@app_views.route("/users/<string:user_id>", methods=["PUT"])
+@app_views.route("/users/<string:user_id>", methods=["PUT", "PATCH"])
 def update_user(user_id):
     """
     Updates a specific User object in the storage.
+    Only the attributes given change, in place; PATCH does the same.
 
     Args:
         user_id (str): The id of the User object to update.
@@ -121,11 +133,6 @@ def update_user(user_id):
     params.pop("updated_at", None)
     params.pop("email", None)
 
-    updated_obj = obj.to_dict()
-    updated_obj.update(params)
-    new_obj = User(**updated_obj)
+    storage.update(obj, params)
 
-    obj.delete()
-    new_obj.save()
-
-    return make_response(jsonify(new_obj.to_dict()), 200)
+    return make_response(jsonify(obj.to_dict()), 200)
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Measures the read throughput of FileStorage with 1 to N reader threads,
+optionally while a writer thread keeps adding and deleting objects.
+
+Usage: ./benchmarks/file_storage_threads.py [objects] [max threads] [secs]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.state import State  # noqa: E402
+from models.city import City  # noqa: E402
+
+
+def populate(storage, n):
+    """fills the storage with n states and 10 cities per state"""
+    FileStorage._FileStorage__objects = {}
+    ids = []
+    for i in range(n):
+        state = State(name="state{}".format(i))
+        storage.new(state)
+        ids.append(state.id)
+        for j in range(10):
+            storage.new(City(name="city{}".format(j), state_id=state.id))
+    return ids
+
+
+def run(storage, ids, readers, seconds, writer):
+    """returns the reads per second done by readers threads"""
+    stop = threading.Event()
+    counts = [0] * readers
+
+    def read(n):
+        """mixes the lookups the API does until stopped"""
+        i = 0
+        while not stop.is_set():
+            state_id = ids[i % len(ids)]
+            storage.get(State, state_id)
+            storage.related(City, "state_id", state_id)
+            storage.count(State)
+            i += 1
+        counts[n] = i * 3
+
+    def write():
+        """adds and deletes a state until stopped"""
+        while not stop.is_set():
+            state = State()
+            storage.new(state)
+            storage.delete(state)
+
+    threads = [threading.Thread(target=read, args=(n,))
+               for n in range(readers)]
+    if writer:
+        threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    storage = FileStorage()
+    ids = populate(storage, n)
+    print("{} states, {} cities".format(storage.count(State),
+                                        storage.count(City)))
+    print("{:>8} {:>16} {:>20}".format("threads", "reads/s",
+                                       "reads/s (+writer)"))
+    threads = 1
+    while threads <= max_threads:
+        print("{:>8} {:>16,.0f} {:>20,.0f}".format(
+            threads, run(storage, ids, threads, seconds, False),
+            run(storage, ids, threads, seconds, True)))
+        threads *= 2
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""
+Compares the amenity filtering of /places_search done by list membership,
+as the view used to, with the bitmask AND and compare of FileStorage.
+
+Usage: ./benchmarks/place_search.py [places] [amenities] [wanted] [runs]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.amenity import Amenity  # noqa: E402
+from models.city import City  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def populate(storage, n, m):
+    """fills the storage with m amenities, 100 cities and n places having
+    a third of the amenities each"""
+    FileStorage._FileStorage__objects = {}
+    rand = random.Random(0)
+    amenities = [Amenity(name="amenity{}".format(i)) for i in range(m)]
+    cities = [City(name="city{}".format(i)) for i in range(100)]
+    for obj in amenities + cities:
+        storage.new(obj)
+    for i in range(n):
+        storage.new(Place(name="place{}".format(i),
+                          city_id=rand.choice(cities).id,
+                          amenity_ids=[amenity.id for amenity in
+                                       rand.sample(amenities, m // 3)]))
+    return [amenity.id for amenity in amenities]
+
+
+def by_membership(storage, amenity_ids):
+    """filters all the places the way the view did before the bitmasks"""
+    amenities = [storage.get(Amenity, amenity_id)
+                 for amenity_id in amenity_ids
+                 if storage.get(Amenity, amenity_id)]
+    places = []
+    for place in storage.all(Place).values():
+        if all(amenity.id in place.amenity_ids for amenity in amenities):
+            places.append(place)
+    return places
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    storage = FileStorage()
+    amenity_ids = populate(storage, n, m)
+    wanted = amenity_ids[:k]
+    found = storage.search_places(amenities=wanted)
+    assert sorted(found, key=id) == sorted(by_membership(storage, wanted),
+                                           key=id)
+    print("{} places, {} amenities, {} wanted: {} found".format(
+        n, m, k, len(found)))
+    print("{:>12} {:>14}".format("method", "ms/search"))
+    for name, search in (
+            ("membership", lambda: by_membership(storage, wanted)),
+            ("bitmask", lambda: storage.search_places(amenities=wanted))):
+        seconds = timeit.timeit(search, number=runs) / runs
+        print("{:>12} {:>14.2f}".format(name, seconds * 1000))
@@ -3,6 +3,7 @@
 
 import cmd
 from datetime import datetime
+import json
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel
@@ -87,16 +88,47 @@ class HBNBCommand(cmd.Cmd):
         else:
             print("** class doesn't exist **")
 
+    def do_import(self, arg):
+        """Creates the instances of a JSON file, a list of their
+        dictionaries or a dictionary of them like file.json, with a single
+        save"""
+        args = shlex.split(arg)
+        if len(args) == 0:
+            print("** file name missing **")
+            return False
+        try:
+            with open(args[0]) as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            print("** file can't be read **")
+            return False
+        if not isinstance(records, (list, dict)):
+            print("** file can't be read **")
+            return False
+        if isinstance(records, dict):
+            records = list(records.values())
+        if any(not isinstance(record, dict) or
+               record.get("__class__") not in classes for record in records):
+            print("** class doesn't exist **")
+            return False
+        models.storage.bulk_new(classes[record["__class__"]](**record)
+                                for record in records)
+        print(len(records))
+
     def do_destroy(self, arg):
-        """Deletes an instance based on the class and id"""
+        """Deletes an instance based on the class and id, or the instances
+        of several ids with a single save"""
         args = shlex.split(arg)
         if len(args) == 0:
             print("** class name missing **")
         elif args[0] in classes:
-            if len(args) > 1:
+            if len(args) > 2:
+                if not models.storage.bulk_delete(classes[args[0]], args[1:]):
+                    print("** no instance found **")
+            elif len(args) > 1:
                 key = args[0] + "." + args[1]
                 if key in models.storage.all():
-                    models.storage.all().pop(key)
+                    models.storage.delete(models.storage.all()[key])
                     models.storage.save()
                 else:
                     print("** no instance found **")
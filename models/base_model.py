@@ -25,9 +25,17 @@ class BaseModel:
         id = Column(String(60), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    else:
+        # _stored: whether the storage holds the object, set by the storage
+        # itself, so that setting the attributes of an object that is not
+        # stored, e.g. the ones reload() builds, does not call it; a slot
+        # rather than an attribute, so that to_dict() does not see it
+        __slots__ = ("_stored", "__dict__", "__weakref__")
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
+        if models.storage_t != "db":
+            object.__setattr__(self, "_stored", False)
         if kwargs:
             for key, value in kwargs.items():
                 if key != "__class__":
@@ -47,6 +55,18 @@ class BaseModel:
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    if models.storage_t != "db":
+        def __setattr__(self, name, value):
+            """sets an attribute and, if the object is stored, lets the
+            storage refresh its indexes and keep the previous attributes
+            in a transaction"""
+            if not self._stored:
+                object.__setattr__(self, name, value)
+                return
+            models.storage.changing(self)
+            super().__setattr__(name, value)
+            models.storage.touch(self, name)
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
@@ -58,6 +78,20 @@ class BaseModel:
         models.storage.new(self)
         models.storage.save()
 
+    def assign(self, changes):
+        """sets the attributes of the dictionary changes that differ from
+        the current ones, except id, created_at, updated_at and __class__,
+        and updates 'updated_at' if any did; returns their names"""
+        names = [name for name, value in changes.items()
+                 if name not in ("id", "created_at", "updated_at",
+                                 "__class__") and
+                 getattr(self, name, None) != value]
+        for name in names:
+            setattr(self, name, changes[name])
+        if names:
+            self.updated_at = datetime.utcnow()
+        return names
+
     def to_dict(self):
         """returns a dictionary containing all keys/values of the instance"""
         new_dict = self.__dict__.copy()
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""
+Contains the LRUCache class
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache:
+    """thread safe cache of at most maxsize values, each expiring ttl
+    seconds after it was put, the least recently used one being evicted
+    to make room for a new one"""
+
+    def __init__(self, maxsize, ttl):
+        """Instantiate a LRUCache object"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """returns the value of key, or None if it is missing or expired"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """stores value under key for ttl seconds"""
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + self.ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def pop(self, key):
+        """forgets the value of key, if any"""
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        """forgets every value"""
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self):
+        """returns the number of values held, the maximum and the hits and
+        misses of get()"""
+        with self.__lock:
+            return {"size": len(self.__entries), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
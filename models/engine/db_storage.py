@@ -11,19 +11,55 @@ from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from contextlib import contextmanager
 from os import getenv
+from models.engine.cache import LRUCache
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, event, func, literal, or_, select
+from sqlalchemy import inspect as inspect_obj
+from sqlalchemy.orm import joinedload, make_transient_to_detached, \
+    scoped_session, selectinload, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.pool import QueuePool
+import threading
+import time
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+class TimedQueuePool(QueuePool):
+    """QueuePool that also counts the checkouts and the time spent waiting
+    for a connection to be free"""
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a TimedQueuePool"""
+        super().__init__(*args, **kwargs)
+        self.timing_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        """checks out a connection, timing the wait"""
+        start = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.monotonic() - start
+            with self.timing_lock:
+                self.checkouts += 1
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+
+
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    __cache = None
+    __local = threading.local()
 
     def __init__(self):
         """Instantiate a DBStorage object"""
@@ -31,21 +67,48 @@ class DBStorage:
         HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
+        HBNB_MYSQL_URL = getenv('HBNB_MYSQL_URL')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        url = HBNB_MYSQL_URL or 'mysql+mysqldb://{}:{}@{}/{}'.format(
+            HBNB_MYSQL_USER, HBNB_MYSQL_PWD, HBNB_MYSQL_HOST, HBNB_MYSQL_DB)
+        self.__engine = create_engine(
+            url, poolclass=TimedQueuePool,
+            pool_size=int(getenv('HBNB_MYSQL_POOL_SIZE', '5')),
+            max_overflow=int(getenv('HBNB_MYSQL_MAX_OVERFLOW', '10')),
+            pool_timeout=float(getenv('HBNB_MYSQL_POOL_TIMEOUT', '30')),
+            pool_recycle=int(getenv('HBNB_MYSQL_POOL_RECYCLE', '3600')),
+            pool_pre_ping=getenv('HBNB_MYSQL_POOL_PRE_PING', '1') == '1')
+        cache_size = int(getenv('HBNB_MYSQL_CACHE_SIZE', '0'))
+        if cache_size > 0:
+            self.__cache = LRUCache(
+                cache_size, float(getenv('HBNB_MYSQL_CACHE_TTL', '60')))
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def pool_stats(self):
+        """Return the state of the connection pool: its size, the
+        connections checked in and out, the overflow in use, and the
+        number of checkouts, timed out ones included, with the total and
+        longest seconds they waited for a connection"""
+        pool = self.__engine.pool
+        stats = {"size": pool.size(), "checked_in": pool.checkedin(),
+                 "checked_out": pool.checkedout(),
+                 "overflow": max(pool.overflow(), 0)}
+        with pool.timing_lock:
+            stats.update(checkouts=pool.checkouts,
+                         wait_time=pool.wait_time, max_wait=pool.max_wait)
+        return stats
+
+    def all(self, cls=None, load=()):
+        """query on the current database session.
+        load names relationships of cls to load along with the objects, as
+        dotted paths such as "cities.places", in a fixed number of queries
+        instead of one per object when they are accessed"""
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                objs = self.__session.query(classes[clss]).options(
+                    *self.__eager(classes[clss], load)).all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
@@ -54,20 +117,106 @@ class DBStorage:
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
+        self.__forget(obj)
 
     def save(self):
-        """commit all changes of the current database session"""
+        """commit all changes of the current database session, or only
+        flush them within a transaction(), which commits them"""
+        if getattr(self.__local, "depth", 0):
+            self.__session.flush()
+        else:
+            self.__session.commit()
+
+    @contextmanager
+    def transaction(self):
+        """context manager committing the session when it exits, or
+        rolling it back if it exits by an exception; the save() calls in
+        between only flush. Nested transactions join the outer one"""
+        local = self.__local
+        if getattr(local, "depth", 0):
+            local.depth += 1
+            try:
+                yield self
+            finally:
+                local.depth -= 1
+            return
+        local.depth = 1
+        try:
+            yield self
+        except BaseException:
+            local.depth = 0
+            self.__session.rollback()
+            raise
+        local.depth = 0
         self.__session.commit()
 
+    def update(self, obj, changes):
+        """sets the attributes of obj to the values of changes that differ,
+        and saves it if any did, with a single UPDATE of those columns"""
+        if obj.assign(changes):
+            self.save()
+        return obj
+
+    def bulk_new(self, objs):
+        """inserts objs, or updates the rows of the ones whose id is
+        already stored, as FileStorage and SQLiteStorage overwrite them,
+        grouping them into executemany statements, and saves.
+        New objects, e.g. built from records, whose id exists are found
+        with a SELECT of their ids per class, 1000 at a time.
+        Their relationships, e.g. place.amenities, are not saved"""
+        objs = list(objs)
+        transient = {}
+        for obj in objs:
+            if inspect_obj(obj).transient:
+                transient.setdefault(type(obj), []).append(obj)
+        stored = set()
+        for cls, new in transient.items():
+            ids = [obj.id for obj in new]
+            for start in range(0, len(ids), 1000):
+                stored.update((cls, row_id) for row_id, in
+                              self.__session.query(cls.id).filter(
+                                  cls.id.in_(ids[start:start + 1000])))
+            columns = [attr.key for attr in inspect_obj(cls).column_attrs]
+            self.__session.bulk_update_mappings(cls, [
+                {column: getattr(obj, column) for column in columns}
+                for obj in new if (cls, obj.id) in stored])
+        self.__session.bulk_save_objects(
+            [obj for obj in objs if (type(obj), obj.id) not in stored])
+        for obj in objs:
+            self.__forget(obj)
+        self.save()
+
+    def bulk_delete(self, cls, ids):
+        """deletes the rows of class cls with the given ids, 1000 at a time
+        with DELETE ... WHERE id IN, and saves; returns how many there
+        were. Unlike delete(), the cascades of the relationships are not
+        applied"""
+        ids = list(ids)
+        count = 0
+        for start in range(0, len(ids), 1000):
+            chunk = ids[start:start + 1000]
+            count += self.__session.query(cls).filter(
+                cls.id.in_(chunk)).delete(synchronize_session="fetch")
+            if self.__cache is not None:
+                for id in chunk:
+                    self.__cache.pop((cls.__name__, id))
+        self.save()
+        return count
+
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
             self.__session.delete(obj)
+            self.__forget(obj)
 
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        if self.__cache is not None:
+            event.listen(sess_factory, "after_flush", self.__flushed)
+            event.listen(sess_factory, "after_commit", self.__committed)
+            event.listen(sess_factory, "after_rollback", self.__rolled_back)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
@@ -75,21 +224,147 @@ class DBStorage:
         """call remove() method on the private session attribute"""
         self.__session.remove()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=()):
         """Return the object based on the class and its ID,
-        or None if not found"""
-        if cls is not None and id is not None:
+        or None if not found; load is as for all().
+        With HBNB_MYSQL_CACHE_SIZE set, the columns of the objects got are
+        cached across sessions, and merged back into the current one
+        without a query until they are written or expire. An object the
+        current session already holds is returned as is, as merging the
+        cached columns into it would undo its changes not flushed yet"""
+        if cls is None or id is None:
+            return None
+        if load:
+            return self.__session.query(cls).options(
+                *self.__eager(cls, load)).filter(cls.id == id).first()
+        if self.__cache is None:
             return self.__session.query(cls).get(id)
-        return None
+        obj = self.__session.identity_map.get(identity_key(cls, id))
+        if obj is not None:
+            state = inspect_obj(obj)
+            if state.modified or not state.expired:
+                return obj
+        cached = self.__cache.get((cls.__name__, id))
+        if cached is not None:
+            return self.__session.merge(cached, load=False)
+        obj = self.__session.query(cls).get(id)
+        if obj is not None:
+            self.__cache.put((cls.__name__, id), self.__detached_copy(obj))
+        return obj
+
+    def cache_stats(self):
+        """Return the size, maximum size, hits and misses of the cache of
+        get(), or None if it is disabled"""
+        if self.__cache is None:
+            return None
+        return self.__cache.stats()
+
+    @staticmethod
+    def __detached_copy(obj):
+        """returns a detached copy of the column attributes of obj, which
+        sessions can merge without querying it"""
+        mapper = inspect_obj(obj).mapper
+        copy = mapper.class_manager.new_instance()
+        for attr in mapper.column_attrs:
+            set_committed_value(copy, attr.key, getattr(obj, attr.key))
+        make_transient_to_detached(copy)
+        return copy
+
+    def __forget(self, obj):
+        """removes obj from the cache of get()"""
+        if self.__cache is not None:
+            self.__cache.pop((obj.__class__.__name__, obj.id))
+
+    def __flushed(self, session, flush_context):
+        """removes the objects a session wrote from the cache of get(),
+        and again once committed, in case another thread cached them from
+        the database in between"""
+        written = session.info.setdefault("written", set())
+        for obj in list(session.new) + list(session.dirty) + \
+                list(session.deleted):
+            self.__forget(obj)
+            written.add((obj.__class__.__name__, obj.id))
+
+    def __committed(self, session):
+        """removes the objects written by a committed session from the
+        cache of get()"""
+        for key in session.info.pop("written", ()):
+            self.__cache.pop(key)
+
+    def __rolled_back(self, session):
+        """drops the objects written by a rolled back session"""
+        session.info.pop("written", None)
+
+    @staticmethod
+    def __eager(cls, load):
+        """returns the loader options of the relationship paths load of
+        cls: collections are loaded by a second SELECT ... IN query per
+        relationship, single objects by a join"""
+        options = []
+        for path in load:
+            option = None
+            owner = cls
+            for name in path.split("."):
+                attr = getattr(owner, name)
+                loader = (selectinload if attr.property.uselist else
+                          joinedload)
+                option = (loader(attr) if option is None else
+                          getattr(option, loader.__name__)(attr))
+                owner = attr.property.mapper.class_
+            options.append(option)
+        return options
 
     def count(self, cls=None):
         """Return the number of objects in storage matching the given class.
         If no class is passed, returns the count of all objects in storage"""
         if cls is not None:
-            objN = 0
-            for key in list(self.all().keys()):
-                clsName = key.split('.')[0]
-                if cls.__name__ == clsName:
-                    objN += 1
-            return objN
-        return len(self.all())
+            cls = classes.get(cls, cls)
+            return self.__session.query(func.count(cls.id)).scalar()
+        return sum(self.counts().values())
+
+    def counts(self):
+        """Return the number of objects of each class name, counted by a
+        single query"""
+        queries = [self.__session.query(literal(name), func.count(cls.id))
+                   for name, cls in classes.items()]
+        return {name: count for name, count in
+                queries[0].union_all(*queries[1:]).all()}
+
+    def page(self, cls, after=None, limit=100):
+        """Return at most limit objects of class cls ordered by id, starting
+        after the id after (keyset pagination)"""
+        cls = classes.get(cls, cls)
+        query = self.__session.query(cls)
+        if after is not None:
+            query = query.filter(cls.id > after)
+        return query.order_by(cls.id).limit(limit).all()
+
+    def iter(self, cls, batch_size=1000):
+        """Yield the objects of class cls ordered by id, querying them
+        batch_size at a time"""
+        after = None
+        while True:
+            batch = self.page(cls, after, batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1].id
+
+    def search_places(self, states=(), cities=(), amenities=()):
+        """Return the places in the states or in the cities given by id,
+        all places if there are neither, having all the amenities given by
+        id that exist, in a single query"""
+        from models.place import place_amenity
+        query = self.__session.query(Place)
+        if states or cities:
+            query = query.join(City, Place.city_id == City.id).filter(
+                or_(City.state_id.in_(states), City.id.in_(cities)))
+        if amenities:
+            wanted = select(func.count(Amenity.id)).where(
+                Amenity.id.in_(amenities)).scalar_subquery()
+            query = query.filter(Place.id.in_(
+                select(place_amenity.c.place_id).
+                where(place_amenity.c.amenity_id.in_(amenities)).
+                group_by(place_amenity.c.place_id).
+                having(func.count(place_amenity.c.amenity_id) == wanted)))
+        return query.all()
@@ -3,17 +3,41 @@
 Contains the FileStorage class
 """
 
+import atexit
+from bisect import bisect_right
+from contextlib import contextmanager
 import json
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine.locks import FileLock, ReadWriteLock
+from models.engine import serializers
+from models.engine.serializers import JSONFormat, formats, write_atomic
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from os import getenv, listdir, makedirs, path, remove, stat
+import threading
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+# foreign key attributes indexed per class name, for related() lookups; an
+# attribute holding a list of ids is indexed under each of them
+relations = {"City": ("state_id",),
+             "Place": ("city_id", "user_id", "amenity_ids"),
+             "Review": ("place_id", "user_id")}
+
+
+class _Record(dict):
+    """dictionary read from the files that lazy mode keeps in __objects
+    until its object is first looked up"""
+
+    def get_attr(self, attr):
+        """returns the attribute attr the object will have"""
+        if attr in self:
+            return self[attr]
+        return getattr(classes[self["__class__"]], attr, None)
 
 
 class FileStorage:
@@ -21,70 +45,911 @@ class FileStorage:
 
     # string - path to the JSON file
     __file_path = "file.json"
+    # class - format __file_path is written in (see serializers.py), it
+    # is read in whichever format it is in
+    __format = formats[getenv("HBNB_FILE_FORMAT", "json")]
+    # boolean - the objects are stored in one file per shard, in the
+    # directory __shard_path, instead of in __file_path
+    __sharded = getenv("HBNB_FILE_SHARDED", "0") == "1"
+    # string - directory of the shard files, <shard>.json each
+    __shard_path = "file.json.d"
+    # integer - characters of the id that, after the class name, name the
+    # shard of an object: 0 makes one shard per class
+    __shard_prefix = int(getenv("HBNB_FILE_SHARD_PREFIX", "0"))
+    # set - shards read since the files last changed, and "<class name>.*"
+    # or "*" once all the shards of a class or all shards were read
+    __shards_fresh = set()
+    # set - shards read at least once into __objects, which a later read
+    # prunes of the objects deleted by someone else
+    __shards_seen = set()
+    # string - path to the journal of changes made since the JSON file
+    __journal_path = "file.json.log"
+    # integer - journal records after which save() compacts the journal
+    # into the JSON file, 0 always rewrites the whole JSON file instead
+    __journal_limit = int(getenv("HBNB_FILE_JOURNAL", "0"))
+    # integer - number of records currently in the journal
+    __journal_size = 0
+    # boolean - the journal ends with a record left incomplete by a crash,
+    # after which an appended record would be lost: the next save compacts
+    __journal_torn = False
+    # string - path to the lock file that processes sharing the JSON file
+    # lock it with, and that holds its generation counter
+    __lock_path = "file.json.lock"
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # boolean - reload() keeps the records it reads as _Record instead
+    # of building their objects until they are looked up
+    __lazy = getenv("HBNB_FILE_LAZY", "0") == "1"
+    # Lock - lets only one thread at a time build an object in lazy mode
+    __load_lock = threading.Lock()
+    # string - "changed" only re-reads __file_path when it was modified
+    # since it was last read or written, "always" re-reads it every time
+    __reload_mode = getenv("HBNB_FILE_RELOAD", "changed")
+    # tuple - (__objects, signature of the files) as of the last read or
+    # write, the signature being the generation counter and the (inode,
+    # size, mtime) of the JSON file and of the journal
+    __loaded = None
+    # dictionary - <class name>: keys of its objects in __objects, kept as
+    # {key: None} to preserve their order
+    __by_class = {}
+    # dictionary - (<class name>, <foreign key>): {value: {key: None}}
+    __by_fk = {}
+    # dictionary - key: (<class name>, ((<foreign key>, value), ...)) as
+    # the object was indexed, to unlink it after it changed
+    __links = {}
+    # dictionary - id listed in a list of ids, e.g. Place.amenity_ids: its
+    # bit in __masks, numbered densely in the order the ids were first seen
+    __bits = {}
+    # dictionary - key: bitmask of the ids of its list of ids, so that
+    # having all of some ids is a single AND and compare
+    __masks = {}
+    # dictionary - key: {attribute: copy} of the list and dictionary
+    # attributes of its object as it was built or stored, to find at the
+    # next save the ones changed in place, which __setattr__ does not see;
+    # kept apart from the indexes, which reload() leaves to be rebuilt
+    __mutables = {}
+    # dictionary - <class name>: sorted ids of its objects, for page(),
+    # dropped whenever an object of the class is added or removed
+    __sorted = {}
+    # tuple - (__objects, len(__objects)) that the indexes are in step with
+    __indexed = None
+    # set - keys added or modified since the last save
+    __changed = set()
+    # set - keys deleted since the last save
+    __removed = set()
+    # dictionary - key: (obj, format, obj encoded in that format) as of its
+    # last serialization, dropped whenever obj changes
+    __fragments = {}
+    # ReadWriteLock - taken for reading by the lookups and by the writes to
+    # the files, and for writing by everything that changes __objects
+    __lock = ReadWriteLock()
+    # RLock - lets only one thread at a time write to the files
+    __persist_lock = threading.RLock()
+    # Lock - lets only one thread at a time rebuild the indexes
+    __index_lock = threading.Lock()
+    # float - seconds between two writes of the background flusher, 0
+    # makes save() write synchronously instead
+    __write_behind = float(getenv("HBNB_FILE_WRITE_BEHIND", "0"))
+    # integer - deferred saves that wake the flusher before its interval
+    __write_batch = int(getenv("HBNB_FILE_WRITE_BATCH", "100"))
+    # integer - save() calls not written out yet in write-behind mode
+    __pending = 0
+    # Condition - guards __pending and wakes the flusher
+    __pending_cond = threading.Condition()
+    # Thread - the background flusher, started by the first deferred save
+    __flusher = None
+    # threading.local - the transaction of the current thread: its depth,
+    # for each key it changed (the object it held, None if absent, a copy
+    # of its attributes, whether it was changed and whether it was
+    # removed) before it changed, and the saves it deferred to its commit
+    __transaction = threading.local()
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
-        if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+    def all(self, cls=None, load=()):
+        """returns the dictionary __objects, or a new dictionary of the
+        objects of class cls. load, the relationships DBStorage would load
+        along, is accepted for compatibility: they are index lookups here.
+        __objects itself is returned as is, so a caller iterating it while
+        other threads add or delete objects must hold the storage lock"""
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        self.__ensure(cls)
+        with self.__lock.read():
+            if cls is not None:
+                self.__index()
+                return {key: self.__load(key)
+                        for key in list(self.__by_class.get(cls, ()))}
+            for key, obj in list(self.__objects.items()):
+                if type(obj) is _Record:
+                    self.__load(key)
         return self.__objects
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
-            self.__objects.update({
-                obj.to_dict()['__class__'] + '.' + obj.id: obj
-                })
+            key = obj.__class__.__name__ + '.' + obj.id
+            with self.__lock.write():
+                self.__undo(key)
+                self.__put(key, obj)
+                self.__changed.add(key)
+                self.__removed.discard(key)
+                self.__fragments.pop(key, None)
+
+    def update(self, obj, changes):
+        """sets the attributes of obj to the values of changes that differ,
+        and saves it if any did, marking it changed once instead of
+        replacing it by a new object"""
+        if obj.assign(changes):
+            self.new(obj)
+            self.save()
+        return obj
+
+    def bulk_new(self, objs):
+        """sets every obj of objs in __objects and saves them with a single
+        write, instead of one per obj as their save() would"""
+        with self.__lock.write():
+            for obj in objs:
+                key = obj.__class__.__name__ + '.' + obj.id
+                self.__undo(key)
+                self.__put(key, obj)
+                self.__changed.add(key)
+                self.__removed.discard(key)
+                self.__fragments.pop(key, None)
+        self.save()
+
+    def bulk_delete(self, cls, ids):
+        """deletes the objects of class cls with the given ids and saves
+        with a single write; returns how many there were"""
+        objs = [obj for obj in (self.get(cls, id) for id in ids)
+                if obj is not None]
+        with self.__lock.write():
+            for obj in objs:
+                self.delete(obj)
+        self.save()
+        return len(objs)
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """serializes __objects to the JSON file (path: __file_path), or in
+        journal mode appends the changes since the last save to the journal
+        (path: __journal_path) and only rewrites the JSON file once the
+        journal holds __journal_limit records.
+        In write-behind mode the write is left to a background thread that
+        does it every __write_behind seconds or after __write_batch saves,
+        see flush().
+        Within a transaction() the write is left to its commit.
+        Setting an attribute marks its object changed; the list and
+        dictionary attributes changed in place instead, one level deep,
+        are found by comparing them with a copy at the time of the write"""
+        if getattr(self.__transaction, "depth", 0):
+            self.__transaction.saves += 1
+            return
+        if self.__write_behind <= 0:
+            self.__persist()
+            return
+        with self.__pending_cond:
+            FileStorage.__pending += 1
+            if self.__flusher is None:
+                FileStorage.__flusher = threading.Thread(
+                    target=self.__flush_behind, name="FileStorage-flusher",
+                    daemon=True)
+                FileStorage.__flusher.start()
+                atexit.register(self.flush)
+            if self.__pending >= self.__write_batch:
+                self.__pending_cond.notify()
 
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+    @contextmanager
+    def transaction(self):
+        """context manager grouping the new(), delete() and save() calls of
+        the current thread into a single write when it exits, or undoing
+        the objects they added, replaced or deleted in __objects, and the
+        attributes set on stored objects, if it exits by an exception.
+        Nested transactions join the outer one.
+        The other threads see the changes as they are made, but cannot
+        write them to the file before the commit"""
+        transaction = self.__transaction
+        if getattr(transaction, "depth", 0):
+            transaction.depth += 1
+            try:
+                yield self
+            finally:
+                transaction.depth -= 1
+            return
+        with self.__persist_lock:
+            transaction.depth, transaction.undo = 1, {}
+            transaction.saves = 0
+            try:
+                yield self
+            except BaseException:
+                transaction.depth = 0
+                self.__rollback(transaction.undo)
+                raise
+            transaction.depth = 0
+            if transaction.saves or transaction.undo:
+                self.save()
+
+    def __undo(self, key):
+        """records, in a transaction, what key held before it changes"""
+        transaction = self.__transaction
+        if getattr(transaction, "depth", 0) and key not in transaction.undo:
+            obj = self.__objects.get(key)
+            attrs = None
+            if obj is not None and type(obj) is not _Record:
+                attrs = {name: type(value)(value)
+                         if type(value) in (list, dict) else value
+                         for name, value in vars(obj).items()}
+            transaction.undo[key] = (obj, attrs, key in self.__changed,
+                                     key in self.__removed)
+
+    def __rollback(self, undo):
+        """puts back in __objects the objects the keys of undo held, with
+        the attributes they had, and whether they were changed or
+        removed"""
+        with self.__lock.write():
+            for key, (obj, attrs, changed, removed) in undo.items():
+                if obj is None:
+                    if key in self.__objects:
+                        self.__remove(key)
+                else:
+                    if attrs is not None:
+                        obj.__dict__.clear()
+                        obj.__dict__.update(attrs)
+                    self.__put(key, obj)
+                self.__fragments.pop(key, None)
+                if changed:
+                    self.__changed.add(key)
+                else:
+                    self.__changed.discard(key)
+                if removed:
+                    self.__removed.add(key)
+                else:
+                    self.__removed.discard(key)
+
+    def flush(self):
+        """writes out the saves deferred in write-behind mode and returns
+        once they are on disk"""
+        with self.__persist_lock:
+            with self.__pending_cond:
+                pending = self.__pending
+                FileStorage.__pending = 0
+            if pending:
+                try:
+                    self.__persist()
+                except BaseException:
+                    with self.__pending_cond:
+                        FileStorage.__pending += pending
+                    raise
+
+    def __flush_behind(self):
+        """runs in the background flusher thread of write-behind mode"""
+        while self.__write_behind > 0:
+            with self.__pending_cond:
+                self.__pending_cond.wait_for(
+                    lambda: self.__pending >= self.__write_batch,
+                    timeout=self.__write_behind)
+            try:
+                self.flush()
+            except Exception:
+                pass
+        with self.__pending_cond:
+            FileStorage.__flusher = None
+
+    def __persist(self, compact=False):
+        """writes the changes since the last write to the journal, or all
+        of __objects to the JSON file, see save().
+        This is done holding the lock file, after merging in what other
+        processes wrote since we last read or wrote the files"""
+        with self.__persist_lock, \
+                FileLock(self.__lock_path).hold(exclusive=True) as fd:
+            signature = self.__signature(fd)
+            loaded = self.__loaded
+            with self.__lock.write():
+                self.__find_changed_in_place()
+            if self.__sharded:
+                self.__persist_shards(loaded, signature, compact)
+                FileLock.bump(fd)
+                FileStorage.__loaded = (self.__objects, self.__signature(fd))
+                return
+            if (loaded is not None and loaded[0] is self.__objects and
+                    loaded[1] != signature):
+                with self.__lock.write():
+                    self.__merge(signature, prune=True)
+                loaded = self.__loaded
+            with self.__lock.read():
+                if (not compact and loaded is not None and
+                        loaded[0] is self.__objects and
+                        self.__journal_size < self.__journal_limit and
+                        not self.__journal_torn):
+                    self.__append()
+                else:
+                    self.__snapshot()
+                FileLock.bump(fd)
+                FileStorage.__loaded = (self.__objects, self.__signature(fd))
+
+    def __find_changed_in_place(self):
+        """marks changed, and indexes again, the objects whose list or
+        dictionary attributes differ from the copies taken when they were
+        indexed, e.g. after place.amenity_ids.append(id)"""
+        self.__index()
+        for key, copies in list(self.__mutables.items()):
+            obj = self.__objects.get(key)
+            if obj is None or type(obj) is _Record:
+                continue
+            current = {attr: getattr(obj, attr, None) for attr in copies}
+            if current != copies:
+                self.__changed.add(key)
+                self.__fragments.pop(key, None)
+                self.__put(key, obj)
+
+    def __persist_shards(self, loaded, signature, compact):
+        """rewrites the shards holding objects changed since the last save,
+        or all of them if compact, after reading the ones that were not
+        read since the files last changed"""
+        if loaded is None or loaded[0] is not self.__objects:
+            with self.__lock.write():
+                self.__shards_fresh.clear()
+                self.__shards_seen.clear()
+                self.__write_shards(None)
+                self.__shards_fresh.add("*")
+            return
+        if loaded[1] != signature:
+            self.__shards_fresh.clear()
+        with self.__lock.write():
+            if compact:
+                self.__merge_shards(self.__shard_files())
+                self.__shards_fresh.add("*")
+            dirty = {self.__shard(key)
+                     for key in self.__changed | self.__removed}
+            self.__merge_shards(dirty)
+        with self.__lock.read():
+            self.__write_shards(None if compact else dirty)
+
+    def __write_shards(self, shards):
+        """writes the shard files of shards, or all shard files removing
+        the ones no object belongs to anymore if shards is None"""
+        fmt = self.__format
+        self.__index()
+        keys = {}
+        for name in (self.__by_class if shards is None else
+                     {shard.partition(".")[0] for shard in shards}):
+            for key in self.__by_class.get(name, ()):
+                keys.setdefault(self.__shard(key), []).append(key)
+        makedirs(self.__shard_path, exist_ok=True)
+        if shards is None:
+            shards = keys.keys() | set(self.__shard_files())
+        for shard in shards:
+            file_path = path.join(self.__shard_path, shard + ".json")
+            if shard not in keys:
+                try:
+                    remove(file_path)
+                except OSError:
+                    pass
+                continue
+            write_atomic(file_path, lambda f: fmt.write(
+                f, ((key, self.__fragment(key, self.__objects[key], fmt))
+                    for key in keys[shard])))
+            self.__shards_fresh.add(shard)
+            self.__shards_seen.add(shard)
+        self.__changed.clear()
+        self.__removed.clear()
+
+    def __shard(self, key):
+        """returns the name of the shard the object stored under key
+        belongs to"""
+        name, _, id = key.partition(".")
+        if self.__shard_prefix > 0:
+            return name + "." + id[:self.__shard_prefix]
+        return name
+
+    def __shard_files(self, name=None):
+        """returns the shards that have a file or were read before, as
+        their file may have been removed since, of the class name only if
+        it is given"""
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
+            files = listdir(self.__shard_path)
+        except OSError:
+            files = []
+        shards = set(self.__shards_seen)
+        for file_name in files:
+            shard, ext = path.splitext(file_name)
+            if ext == ".json":
+                shards.add(shard)
+        return [shard for shard in shards
+                if name is None or shard.partition(".")[0] == name]
+
+    def __ensure(self, name=None, id=None):
+        """reads, in sharded mode, the shards of the objects of class name
+        (of id only, if given), or all of them if name is None, that were
+        not read since the files last changed"""
+        loaded = self.__loaded
+        if (not self.__sharded or loaded is None or
+                loaded[0] is not self.__objects):
+            return
+        fresh = self.__shards_fresh
+        if name is None:
+            wanted = "*"
+        elif id is not None and self.__shard_prefix > 0:
+            wanted = self.__shard(name + "." + id)
+        else:
+            wanted = name + ".*"
+        if "*" in fresh or wanted in fresh or "{}.*".format(name) in fresh:
+            return
+        with FileLock(self.__lock_path).hold() as fd, self.__lock.write():
+            signature = self.__signature(fd)
+            if self.__loaded[1] != signature:
+                self.__shards_fresh.clear()
+                FileStorage.__loaded = (self.__objects, signature)
+            self.__merge_shards(self.__shard_files(name)
+                                if wanted.endswith("*") else [wanted])
+            self.__shards_fresh.add(wanted)
+
+    def __merge_shards(self, shards):
+        """reads the shards that were not read since the files last
+        changed"""
+        for shard in shards:
+            if shard not in self.__shards_fresh:
+                self.__merge_shard(shard)
+
+    def __merge_shard(self, shard):
+        """replaces the objects of shard with the ones in its file, like
+        __merge() does for the JSON file"""
+        file_path = path.join(self.__shard_path, shard + ".json")
+        seen = set()
+        try:
+            with open(file_path, 'rb') as f:
+                for key, record in serializers.read(f):
+                    seen.add(key)
+                    self.__merge_record(key, record)
+        except FileNotFoundError:
+            pass
         except Exception:
+            return
+        if shard in self.__shards_seen:
+            self.__index()
+            for key in list(self.__by_class.get(shard.partition(".")[0],
+                                                ())):
+                if (key not in seen and key not in self.__changed and
+                        self.__shard(key) == shard):
+                    self.__remove(key)
+        self.__shards_fresh.add(shard)
+        self.__shards_seen.add(shard)
+
+    def compact(self):
+        """writes all of __objects to the JSON file and empties the
+        journal"""
+        self.__persist(compact=True)
+
+    def __snapshot(self):
+        """writes all of __objects to the JSON file and removes the
+        journal; only objects changed since they were last serialized are
+        serialized again; they are written one at a time rather than
+        building the whole file in memory first"""
+        fmt = self.__format
+        write_atomic(self.__file_path, lambda f: fmt.write(
+            f, ((key, self.__fragment(key, obj, fmt))
+                for key, obj in self.__objects.items())))
+        try:
+            remove(self.__journal_path)
+        except OSError:
             pass
+        FileStorage.__journal_size = 0
+        FileStorage.__journal_torn = False
+        self.__changed.clear()
+        self.__removed.clear()
+
+    def __append(self):
+        """appends a record per key changed since the last save to the
+        journal"""
+        records = []
+        for key in self.__changed:
+            obj = self.__objects.get(key)
+            if obj is not None:
+                records.append(b'{"op": "set", "key": ' +
+                               json.dumps(key).encode() + b', "obj": ' +
+                               self.__fragment(key, obj, JSONFormat) +
+                               b'}\n')
+        for key in self.__removed:
+            records.append(b'{"op": "delete", "key": ' +
+                           json.dumps(key).encode() + b'}\n')
+        if records:
+            with open(self.__journal_path, 'ab') as f:
+                f.write(b"".join(records))
+        FileStorage.__journal_size += len(records)
+        self.__changed.clear()
+        self.__removed.clear()
+
+    def __fragment(self, key, obj, fmt):
+        """returns obj encoded in the format fmt, encoding it again only if
+        it changed since the last time"""
+        fragment = self.__fragments.get(key)
+        if (fragment is None or fragment[0] is not obj or
+                fragment[1] is not fmt):
+            fragment = (obj, fmt, fmt.encode(
+                dict(obj) if type(obj) is _Record else obj.to_dict()))
+            self.__fragments[key] = fragment
+        return fragment[2]
+
+    def reload(self):
+        """deserializes the JSON file to __objects and replays the journal
+        on top of it; objects added, changed or deleted since the last save
+        are left as they are"""
+        with FileLock(self.__lock_path).hold() as fd:
+            signature = self.__signature(fd)
+            loaded = self.__loaded
+            if (self.__reload_mode == "changed" and
+                    loaded is not None and loaded[0] is self.__objects and
+                    loaded[1] == signature):
+                return
+            with self.__lock.write():
+                if self.__sharded:
+                    if loaded is None or loaded[0] is not self.__objects:
+                        self.__shards_seen.clear()
+                    self.__shards_fresh.clear()
+                    FileStorage.__loaded = (self.__objects, signature)
+                    return
+                self.__merge(signature, prune=loaded is not None and
+                             loaded[0] is self.__objects)
+
+    def __merge(self, signature, prune=False):
+        """replaces the objects of __objects with the ones in the files,
+        except the ones added, changed or deleted since the last save.
+        With prune, the objects that are not in the files anymore, and
+        were not added since the last save, are deleted too.
+        The JSON file is parsed as its objects are built, so that it is
+        never held in memory as a whole; __objects is left as is if it
+        cannot be opened, and with the objects read so far if it is
+        corrupted, and then read again by the next save.
+        A file that does not exist is read as empty, and its signature
+        recorded, so that the first save merges what other processes wrote
+        in the meantime rather than writing over it"""
+        try:
+            f = open(self.__file_path, 'rb')
+        except FileNotFoundError:
+            f = None
+        except OSError:
+            FileStorage.__loaded = (self.__objects, None)
+            return
+        seen = set()
+        try:
+            journal, journal_size = self.__replay()
+            for key, record in serializers.read(f) if f else ():
+                if key not in journal:
+                    seen.add(key)
+                    self.__merge_record(key, record)
+        except Exception:
+            FileStorage.__loaded = (self.__objects, None)
+            return
+        finally:
+            if f:
+                f.close()
+        for key, record in journal.items():
+            if record is not None:
+                seen.add(key)
+                self.__merge_record(key, record)
+        if prune:
+            for key in list(self.__objects):
+                if key not in seen and key not in self.__changed:
+                    self.__remove(key)
+        FileStorage.__journal_size = journal_size
+        FileStorage.__loaded = (self.__objects, signature)
+
+    def __merge_record(self, key, record):
+        """stores the object of the record read from the files under key,
+        unless it was added, changed or deleted since the last save.
+        The indexes are left to be rebuilt at once by the next lookup
+        rather than updated record by record"""
+        if key in self.__removed or (key in self.__changed and
+                                     key in self.__objects):
+            return
+        FileStorage.__indexed = None
+        self.__fragments.pop(key, None)
+        if self.__lazy:
+            self.__mutables.pop(key, None)
+            self.__objects[key] = _Record(record)
+        else:
+            obj = classes[record["__class__"]](**record)
+            object.__setattr__(obj, "_stored", True)
+            self.__copy_mutables(key, obj)
+            self.__objects[key] = obj
+
+    def __replay(self):
+        """reads the journal, stopping at a record left incomplete by a
+        crash, and returns the {key: last record, None if deleted} it
+        leaves and how many records were read; finding such a record sets
+        __journal_torn"""
+        journal = {}
+        applied = 0
+        FileStorage.__journal_torn = False
+        try:
+            f = open(self.__journal_path, 'r')
+        except OSError:
+            return journal, applied
+        with f:
+            for line in f:
+                try:
+                    if not line.endswith("\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    FileStorage.__journal_torn = True
+                    break
+                journal[record["key"]] = (record["obj"] if record["op"] ==
+                                          "set" else None)
+                applied += 1
+        return journal, applied
+
+    def __signature(self, fd):
+        """returns the generation counter of the held lock file fd, and the
+        (inode, size, mtime) of the JSON file and of the journal, None for
+        a file that does not exist"""
+        signature = [FileLock.generation(fd)]
+        for file_path in (self.__shard_path if self.__sharded else
+                          self.__file_path, self.__journal_path):
+            try:
+                st = stat(file_path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
 
     def delete(self, obj=None):
         """delete obj from __objects if its inside"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            with self.__lock.write():
+                if key in self.__objects:
+                    self.__undo(key)
+                    self.__remove(key)
+                    self.__changed.discard(key)
+                    self.__removed.add(key)
+
+    def changing(self, obj):
+        """records, in a transaction, the attributes of a stored obj about
+        to be set, for a rollback to restore them"""
+        if getattr(self.__transaction, "depth", 0):
+            key = "{}.{}".format(obj.__class__.__name__,
+                                 getattr(obj, "id", None))
+            if self.__objects.get(key) is obj:
+                with self.__lock.write():
+                    self.__undo(key)
+
+    def touch(self, obj, name):
+        """marks a stored obj as changed and refreshes its indexes after
+        its attribute name was set"""
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", None))
+        if self.__objects.get(key) is obj:
+            with self.__lock.write():
+                self.__changed.add(key)
+                self.__fragments.pop(key, None)
+                if (name in relations.get(obj.__class__.__name__, ()) or
+                        type(getattr(obj, name, None)) in (list, dict) or
+                        key in self.__mutables):
+                    self.__put(key, obj)
+
+    def related(self, cls, attr, value):
+        """returns the list of cls objects whose attribute attr is value,
+        e.g. related(City, "state_id", state.id) for the cities of a state"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if attr not in relations.get(cls, ()):
+            return [obj for obj in self.all(cls).values()
+                    if getattr(obj, attr, None) == value]
+        self.__ensure(cls)
+        with self.__lock.read():
+            self.__index()
+            return [self.__load(key) for key in
+                    list(self.__by_fk.get((cls, attr), {}).get(value, ()))]
+
+    def __load(self, key):
+        """returns the object stored under key, building it first if lazy
+        mode left it as a _Record"""
+        obj = self.__objects.get(key)
+        if type(obj) is not _Record:
+            return obj
+        with self.__load_lock:
+            record = self.__objects.get(key)
+            if type(record) is not _Record:
+                return record
+            obj = classes[record["__class__"]](**record)
+            object.__setattr__(obj, "_stored", True)
+            self.__copy_mutables(key, obj)
+            self.__objects[key] = obj
+            return obj
+
+    def __remove(self, key):
+        """removes key from __objects and from the indexes"""
+        self.__fragments.pop(key, None)
+        if key in self.__objects:
+            self.__index()
+            self.__unlink(key)
+            del self.__objects[key]
+            FileStorage.__indexed = (self.__objects, len(self.__objects))
+
+    def __put(self, key, obj):
+        """stores obj in __objects under key and in the indexes"""
+        self.__index()
+        self.__unlink(key)
+        self.__objects[key] = obj
+        if type(obj) is not _Record:
+            object.__setattr__(obj, "_stored", True)
+            self.__copy_mutables(key, obj)
+        self.__link(key, obj)
+        FileStorage.__indexed = (self.__objects, len(self.__objects))
+
+    def __link(self, key, obj, indexes=None):
+        """adds obj to the class and foreign key indexes under key, or to
+        the (by_class, by_fk, links, bits, masks) indexes being rebuilt"""
+        by_class, by_fk, links, bits, masks = indexes or (
+            self.__by_class, self.__by_fk, self.__links, self.__bits,
+            self.__masks)
+        lazy = type(obj) is _Record
+        name = obj["__class__"] if lazy else obj.__class__.__name__
+        by_class.setdefault(name, {})[key] = None
+        if indexes is None:
+            self.__sorted.pop(name, None)
+        fks = []
+        for attr in relations.get(name, ()):
+            value = obj.get_attr(attr) if lazy else getattr(obj, attr, None)
+            by_value = by_fk.setdefault((name, attr), {})
+            if isinstance(value, list):
+                value = tuple(value)
+                mask = 0
+                for item in value:
+                    by_value.setdefault(item, {})[key] = None
+                    mask |= 1 << bits.setdefault(item, len(bits))
+                masks[key] = mask
+            else:
+                by_value.setdefault(value, {})[key] = None
+            fks.append((attr, value))
+        links[key] = (name, tuple(fks))
+
+    def __copy_mutables(self, key, obj):
+        """keeps in __mutables a copy of the list and dictionary attributes
+        of obj"""
+        copies = {attr: type(value)(value) for attr, value in
+                  vars(obj).items() if type(value) in (list, dict)}
+        if copies:
+            self.__mutables[key] = copies
+
+    def __unlink(self, key):
+        """removes key from the class and foreign key indexes"""
+        name, fks = self.__links.pop(key, (None, ()))
+        self.__by_class.get(name, {}).pop(key, None)
+        self.__sorted.pop(name, None)
+        self.__masks.pop(key, None)
+        self.__mutables.pop(key, None)
+        for attr, value in fks:
+            by_value = self.__by_fk.get((name, attr), {})
+            for item in value if type(value) is tuple else (value,):
+                children = by_value.get(item, {})
+                children.pop(key, None)
+                if not children:
+                    by_value.pop(item, None)
+
+    def __index(self):
+        """rebuilds the indexes if __objects was replaced or resized without
+        going through new/delete/reload"""
+        if not self.__index_stale():
+            return
+        with self.__index_lock:
+            if not self.__index_stale():
+                return
+            indexes = ({}, {}, {}, {}, {})
+            for key, obj in list(self.__objects.items()):
+                self.__link(key, obj, indexes)
+            (FileStorage.__by_class, FileStorage.__by_fk,
+             FileStorage.__links, FileStorage.__bits,
+             FileStorage.__masks) = indexes
+            FileStorage.__sorted = {}
+            FileStorage.__indexed = (self.__objects, len(self.__objects))
+
+    def __index_stale(self):
+        """tells whether the indexes are out of step with __objects"""
+        indexed = self.__indexed
+        return (indexed is None or indexed[0] is not self.__objects or
+                indexed[1] != len(self.__objects))
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
+        """call reload() method for deserializing the JSON file to objects,
+        which is a no-op unless the file was modified by someone else"""
         self.reload()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=()):
         """Return the object based on the class and its ID,
-        or None if not found"""
+        or None if not found; load is as for all()"""
         if cls is not None and id is not None:
-            return self.__objects.get(cls.__name__ + '.' + id)
+            self.__ensure(cls.__name__, id)
+            with self.__lock.read():
+                return self.__load(cls.__name__ + '.' + id)
         return None
 
     def count(self, cls=None):
         """Return the number of objects in storage matching the given class.
         If no class is passed, returns the count of all objects in storage"""
         if cls is not None:
-            objN = 0
-            for key in list(self.__objects.keys()):
-                clsName = key.split('.')[0]
-                if cls.__name__ == clsName:
-                    objN += 1
-            return objN
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            self.__ensure(cls)
+            with self.__lock.read():
+                self.__index()
+                return len(self.__by_class.get(cls, ()))
+        self.__ensure(None)
         return len(self.__objects)
+
+    def counts(self):
+        """Return the number of objects of each class name"""
+        self.__ensure(None)
+        with self.__lock.read():
+            self.__index()
+            return {name: len(self.__by_class.get(name, ()))
+                    for name in classes}
+
+    def page(self, cls, after=None, limit=100):
+        """Return at most limit objects of class cls ordered by id, starting
+        after the id after (keyset pagination)"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__ensure(cls)
+        with self.__lock.read():
+            self.__index()
+            ids = self.__sorted.get(cls)
+            if ids is None:
+                ids = sorted(key.partition('.')[2]
+                             for key in self.__by_class.get(cls, ()))
+                self.__sorted[cls] = ids
+            start = 0 if after is None else bisect_right(ids, after)
+            return [self.__load(cls + '.' + id)
+                    for id in ids[start:start + limit]]
+
+    def iter(self, cls, batch_size=1000):
+        """Yield the objects of class cls ordered by id, batch_size at a
+        time, seeing the objects added or deleted meanwhile like a database
+        cursor would"""
+        after = None
+        while True:
+            batch = self.page(cls, after, batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1].id
+
+    def search_places(self, states=(), cities=(), amenities=()):
+        """Return the places in the states or in the cities given by id,
+        all places if there are neither, having all the amenities given by
+        id that exist.
+        The places are looked up in the foreign key indexes, the ones of
+        the smallest amenity if there are neither states nor cities, and
+        filtered by a single AND and compare of their amenity bitmask.
+        A list of ids changed in place, e.g. amenity_ids.append(id), is
+        indexed again once its object is passed to new() or saved"""
+        for name in ("City", "Place", "Amenity"):
+            self.__ensure(name)
+        with self.__lock.read():
+            self.__index()
+            by_fk, bits = self.__by_fk, self.__bits
+            wanted = {id for id in amenities
+                      if "Amenity." + id in self.__objects}
+            if amenities and not wanted:
+                return []
+            if not all(id in bits for id in wanted):
+                return []
+            want = 0
+            for id in wanted:
+                want |= 1 << bits[id]
+            if states or cities:
+                city_ids = set(cities)
+                cities_of = by_fk.get(("City", "state_id"), {})
+                for state_id in states:
+                    city_ids.update(key.partition('.')[2] for key
+                                    in cities_of.get(state_id, ()))
+                places_of = by_fk.get(("Place", "city_id"), {})
+                keys = [key for city_id in city_ids
+                        for key in places_of.get(city_id, ())]
+            elif wanted:
+                having = by_fk.get(("Place", "amenity_ids"), {})
+                keys = min((having.get(id, {}) for id in wanted), key=len)
+            else:
+                keys = self.__by_class.get("Place", {})
+            if want:
+                masks = self.__masks
+                keys = [key for key in keys
+                        if masks.get(key, 0) & want == want]
+            return [self.__load(key) for key in list(keys)]
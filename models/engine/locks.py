@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+"""
+Contains the ReadWriteLock and FileLock classes
+"""
+
+from contextlib import contextmanager
+import os
+import threading
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class ReadWriteLock:
+    """lock that lets any number of threads read at the same time but only
+    one thread write, with no reader in between.
+    Both sides are reentrant and a writer may also read; waiting writers
+    go before new readers so that they are not starved"""
+
+    def __init__(self):
+        """Instantiate a ReadWriteLock object"""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__writes = 0
+        self.__waiting_writers = 0
+        self.__local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """context manager holding the lock for reading"""
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """context manager holding the lock for writing"""
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+    def acquire_read(self):
+        """blocks until no thread writes or waits to write"""
+        depth = getattr(self.__local, "reads", 0)
+        if depth or self.__writer == threading.get_ident():
+            self.__local.reads = depth + 1
+            return
+        with self.__cond:
+            while self.__writer is not None or self.__waiting_writers:
+                self.__cond.wait()
+            self.__readers += 1
+        self.__local.reads = 1
+
+    def release_read(self):
+        """releases the lock taken by acquire_read()"""
+        self.__local.reads -= 1
+        if self.__local.reads or self.__writer == threading.get_ident():
+            return
+        with self.__cond:
+            self.__readers -= 1
+            if not self.__readers:
+                self.__cond.notify_all()
+
+    def acquire_write(self):
+        """blocks until no other thread reads or writes"""
+        me = threading.get_ident()
+        if self.__writer == me:
+            self.__writes += 1
+            return
+        if getattr(self.__local, "reads", 0):
+            raise RuntimeError("cannot upgrade a read lock to a write lock")
+        with self.__cond:
+            self.__waiting_writers += 1
+            while self.__writer is not None or self.__readers:
+                self.__cond.wait()
+            self.__waiting_writers -= 1
+            self.__writer = me
+            self.__writes = 1
+
+    def release_write(self):
+        """releases the lock taken by acquire_write()"""
+        self.__writes -= 1
+        if self.__writes:
+            return
+        with self.__cond:
+            self.__writer = None
+            self.__cond.notify_all()
+
+
+class FileLock:
+    """advisory lock shared by all the processes using the same lock file,
+    which also holds a generation counter that writers bump so that the
+    other processes can tell cheaply that their copy of the data is stale.
+    Where fcntl is not available (Windows) only the counter is kept"""
+
+    def __init__(self, path):
+        """Instantiate a FileLock object on the lock file path"""
+        self.path = path
+
+    @contextmanager
+    def hold(self, exclusive=False):
+        """context manager holding the lock, shared unless exclusive is
+        True; yields the file descriptor of the lock file"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield fd
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def generation(fd):
+        """returns the generation counter stored in the lock file fd"""
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            return int(os.read(fd, 32) or 0)
+        except ValueError:
+            return 0
+
+    @staticmethod
+    def bump(fd):
+        """increments the generation counter of the lock file fd, which
+        must be held exclusively, and returns the new generation"""
+        generation = FileLock.generation(fd) + 1
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, "{}\n".format(generation).encode())
+        return generation
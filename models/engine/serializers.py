@@ -0,0 +1,309 @@
+#!/usr/bin/python3
+"""
+Contains the formats FileStorage can write its file in, and a command to
+convert a file from one format to another:
+
+    python3 -m models.engine.serializers <json|pickle|zlib> [src] [dst]
+"""
+
+import codecs
+import io
+import json
+from models.engine.locks import FileLock
+import os
+import pickle
+import re
+import sys
+from tempfile import mkstemp
+import zlib
+
+
+class _Format:
+    """base of the formats: write() and read() stream the records one at a
+    time, dump() and load() do the same in memory"""
+    name = None
+    magic = b""
+
+    @classmethod
+    def dump(cls, items):
+        """returns the content of a file holding the (key, encoded record)
+        items"""
+        f = io.BytesIO()
+        cls.write(f, items)
+        return f.getvalue()
+
+    @classmethod
+    def load(cls, data):
+        """returns the {key: record} dictionary held by the content data"""
+        return dict(cls.read(io.BytesIO(data)))
+
+
+class _Scanner:
+    """reads JSON values one at a time from a binary file, keeping only
+    the part of it that was read but not parsed yet"""
+    whitespace = re.compile(r"[ \t\n\r]*")
+    decoder = json.JSONDecoder()
+    chunk_size = 1 << 16
+
+    def __init__(self, f):
+        """Instantiate a _Scanner object reading the file f"""
+        self.f = f
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """reads the next chunk of the file, returns False at its end"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.eof = not chunk
+        self.buf = self.buf[self.pos:] + self.utf8.decode(chunk, self.eof)
+        self.pos = 0
+        return not self.eof
+
+    def char(self, peek=False):
+        """returns the next character that is not whitespace, "" at the
+        end of the file"""
+        while True:
+            self.pos = self.whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                break
+        c = self.buf[self.pos:self.pos + 1]
+        if not peek:
+            self.pos += len(c)
+        return c
+
+    def expect(self, c):
+        """consumes the character c, raises ValueError if it is not next"""
+        if self.char() != c:
+            raise ValueError("expected {!r} at {}".format(c, self.pos))
+
+    def value(self):
+        """returns the next JSON value"""
+        self.char(peek=True)
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+            if end < len(self.buf) or not self.fill():
+                break
+        self.pos = end
+        return value
+
+
+class JSONFormat(_Format):
+    """one JSON object mapping each <class name>.id to its record"""
+    name = "json"
+
+    @staticmethod
+    def encode(record):
+        """returns the encoded record, to be passed to write()"""
+        return json.dumps(record).encode()
+
+    @classmethod
+    def write(cls, f, items):
+        """writes to the binary file f the (key, encoded record) items"""
+        sep = b"{"
+        for key, record in items:
+            f.write(sep + json.dumps(key).encode() + b": " + record)
+            sep = b", "
+        f.write(b"{}" if sep == b"{" else b"}")
+
+    @classmethod
+    def read(cls, f):
+        """yields the (key, record) items of the binary file f, parsing it
+        as they are consumed"""
+        scanner = _Scanner(f)
+        scanner.expect("{")
+        if scanner.char(peek=True) == "}":
+            return
+        while True:
+            key = scanner.value()
+            scanner.expect(":")
+            yield key, scanner.value()
+            c = scanner.char()
+            if c == "}":
+                break
+            if c != ",":
+                raise ValueError("expected ',' or '}}' at {}".
+                                 format(scanner.pos))
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """unpickler refusing anything but plain data, so that a crafted file
+    cannot make it import and call arbitrary code"""
+
+    def find_class(self, module, name):
+        """refuses every class or function the pickle refers to"""
+        raise pickle.UnpicklingError("{}.{} is not plain data".
+                                     format(module, name))
+
+
+class PickleFormat(_Format):
+    """a pickle of each <class name>.id followed by a pickle of its record,
+    which is faster to read than JSON"""
+    name = "pickle"
+    magic = b"HBNB-PICKLE\n"
+
+    @staticmethod
+    def encode(record):
+        """returns the encoded record, to be passed to write()"""
+        return pickle.dumps(record, protocol=4)
+
+    @classmethod
+    def write(cls, f, items):
+        """writes to the binary file f the (key, encoded record) items"""
+        f.write(cls.magic)
+        write, finish = cls._packer(f)
+        for key, record in items:
+            write(pickle.dumps(key, protocol=4) + record)
+        finish()
+
+    @classmethod
+    def read(cls, f):
+        """yields the (key, record) items of the binary file f, reading it
+        as they are consumed"""
+        if f.read(len(cls.magic)) != cls.magic:
+            raise ValueError("not a {} file".format(cls.name))
+        f = cls._unpacker(f)
+        while True:
+            try:
+                key = _PlainUnpickler(f).load()
+            except EOFError:
+                break
+            yield key, _PlainUnpickler(f).load()
+
+    @staticmethod
+    def _packer(f):
+        """returns the (write, finish) functions storing the body after
+        the magic"""
+        return f.write, lambda: None
+
+    @staticmethod
+    def _unpacker(f):
+        """returns a file reading the body as it was before _packer()"""
+        return f
+
+
+class _Inflater(io.RawIOBase):
+    """raw file decompressing the zlib stream of another file"""
+
+    def __init__(self, f):
+        """Instantiate an _Inflater object reading the file f"""
+        self.f = f
+        self.zlib = zlib.decompressobj()
+        self.pending = b""
+
+    def readable(self):
+        """tells that the file can be read"""
+        return True
+
+    def readinto(self, b):
+        """decompresses into b the next bytes, returns their number"""
+        while not self.pending and not self.zlib.eof:
+            chunk = self.f.read(_Scanner.chunk_size)
+            if not chunk:
+                raise ValueError("truncated zlib stream")
+            self.pending = self.zlib.decompress(chunk)
+        n = min(len(b), len(self.pending))
+        b[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+class ZlibFormat(PickleFormat):
+    """the pickle format, compressed with zlib"""
+    name = "zlib"
+    magic = b"HBNB-ZLIB\n"
+
+    @staticmethod
+    def _packer(f):
+        """returns the (write, finish) functions storing the body after
+        the magic"""
+        compressor = zlib.compressobj()
+        return (lambda data: f.write(compressor.compress(data)),
+                lambda: f.write(compressor.flush()))
+
+    @staticmethod
+    def _unpacker(f):
+        """returns a file reading the body as it was before _packer()"""
+        return io.BufferedReader(_Inflater(f))
+
+
+formats = {"json": JSONFormat, "pickle": PickleFormat, "zlib": ZlibFormat}
+
+
+def detect(data):
+    """returns the format of the file starting with the bytes data"""
+    for fmt in (PickleFormat, ZlibFormat):
+        if data.startswith(fmt.magic):
+            return fmt
+    return JSONFormat
+
+
+def read(f):
+    """yields the (key, record) items of the binary file f, in any format,
+    reading it as they are consumed"""
+    head = f.read(max(len(fmt.magic) for fmt in formats.values()))
+    f.seek(0)
+    return detect(head).read(f)
+
+
+def write_atomic(file_path, write):
+    """replaces file_path atomically with what the function write writes
+    to the binary file it is passed: it is written and synced to a
+    temporary file that is then renamed over file_path, so a crash leaves
+    either the old or the new content"""
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except OSError:
+        mode = 0o644
+    fd, tmp_path = mkstemp(dir=os.path.dirname(os.path.abspath(file_path)),
+                           prefix=os.path.basename(file_path) + ".")
+    try:
+        os.chmod(tmp_path, mode)
+        with open(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def convert(name, src="file.json", dst=None):
+    """rewrites the file src, in any format, to dst (src by default) in
+    the format called name, holding the lock of dst; returns the number of
+    records converted"""
+    fmt = formats[name]
+    dst = dst or src
+    count = 0
+
+    def items(f):
+        """yields the records of src encoded in fmt, counting them"""
+        nonlocal count
+        for key, record in read(f):
+            count += 1
+            yield key, fmt.encode(record)
+
+    with FileLock(dst + ".lock").hold(exclusive=True) as fd:
+        with open(src, 'rb') as f:
+            write_atomic(dst, lambda out: fmt.write(out, items(f)))
+        FileLock.bump(fd)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in formats:
+        sys.exit("Usage: python3 -m models.engine.serializers <{}> "
+                 "[src] [dst]".format("|".join(formats)))
+    print("{} records converted".format(convert(*sys.argv[1:4])))
@@ -0,0 +1,381 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from contextlib import contextmanager
+import json
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from os import getenv
+import sqlite3
+import threading
+
+classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
+           "Place": Place, "Review": Review, "State": State, "User": User}
+# table of each class name
+tables = {"Amenity": "amenities", "BaseModel": "base_models",
+          "City": "cities", "Place": "places", "Review": "reviews",
+          "State": "states", "User": "users"}
+# foreign key attributes stored, and indexed, in their own column
+relations = {"City": ("state_id",), "Place": ("city_id", "user_id"),
+             "Review": ("place_id", "user_id")}
+
+
+class SQLiteStorage:
+    """interacts with a SQLite database, in which every object is stored as
+    its id, its foreign keys and the JSON of its dictionary.
+    Like the session of DBStorage, each thread has its own connection and
+    its own objects: the ones it looked up, added, changed or deleted, the
+    changes being written by save()"""
+    __path = None
+    __local = None
+
+    def __init__(self):
+        """Instantiate a SQLiteStorage object"""
+        self.__path = getenv('HBNB_SQLITE_DB', 'hbnb.db')
+        self.__local = threading.local()
+        if getenv('HBNB_ENV') == "test":
+            with self.__connection() as conn:
+                for table in tables.values():
+                    conn.execute("DROP TABLE IF EXISTS " + table)
+
+    def __connection(self):
+        """returns the connection of the current thread"""
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.__path, timeout=30,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+        return conn
+
+    def __state(self):
+        """returns the (objects, changed keys, deleted keys) of the current
+        thread"""
+        state = getattr(self.__local, "state", None)
+        if state is None:
+            state = self.__local.state = ({}, set(), set())
+        return state
+
+    def __build(self, name, data):
+        """returns the object of class name stored as the JSON data, the
+        one already looked up by the current thread if any.
+        The stored password is already hashed, so it is set without going
+        through User.__setattr__, which would hash it again"""
+        objects = self.__state()[0]
+        record = json.loads(data)
+        key = name + '.' + record["id"]
+        obj = objects.get(key)
+        if obj is None:
+            password = record.pop("password", None)
+            obj = classes[name](**record)
+            if password is not None:
+                obj.__dict__["password"] = password
+            object.__setattr__(obj, "_stored", True)
+            objects[key] = obj
+        return obj
+
+    def __names(self, cls):
+        """returns the class names cls stands for, all of them if None"""
+        if cls is None:
+            return list(classes)
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return [cls] if cls in classes else []
+
+    def __pending(self, name):
+        """returns the objects of class name changed but not saved yet"""
+        objects, changed = self.__state()[:2]
+        return [objects[key] for key in changed
+                if key.partition('.')[0] == name]
+
+    def all(self, cls=None, load=()):
+        """query on the current database, including the changes not saved
+        yet. load, the relationships DBStorage would load along, is
+        accepted for compatibility: they are indexed queries here"""
+        conn = self.__connection()
+        removed = self.__state()[2]
+        new_dict = {}
+        for name in self.__names(cls):
+            for data, in conn.execute(
+                    "SELECT data FROM {}".format(tables[name])):
+                obj = self.__build(name, data)
+                new_dict[name + '.' + obj.id] = obj
+            for obj in self.__pending(name):
+                new_dict[name + '.' + obj.id] = obj
+            for key in removed:
+                new_dict.pop(key, None)
+        return new_dict
+
+    def new(self, obj):
+        """adds the object to the objects to write on the next save"""
+        if obj is not None:
+            objects, changed, removed = self.__state()
+            key = obj.__class__.__name__ + '.' + obj.id
+            object.__setattr__(obj, "_stored", True)
+            objects[key] = obj
+            changed.add(key)
+            removed.discard(key)
+
+    def update(self, obj, changes):
+        """sets the attributes of obj to the values of changes that differ,
+        and saves it if any did, with a single INSERT OR REPLACE"""
+        if obj.assign(changes):
+            self.new(obj)
+            self.save()
+        return obj
+
+    def bulk_new(self, objs):
+        """adds objs and saves them, with one executemany per table"""
+        for obj in objs:
+            self.new(obj)
+        self.save()
+
+    def bulk_delete(self, cls, ids):
+        """deletes the objects of class cls with the given ids and saves,
+        with a single executemany; returns how many there were"""
+        objs = [obj for obj in (self.get(cls, id) for id in ids)
+                if obj is not None]
+        for obj in objs:
+            self.delete(obj)
+        self.save()
+        return len(objs)
+
+    @contextmanager
+    def transaction(self):
+        """context manager leaving the save() calls of the current thread to
+        its exit, which saves once, or, if it exits by an exception,
+        forgetting the changes made since it was entered, including the
+        attributes set on the objects it holds. Nested transactions join
+        the outer one"""
+        local = self.__local
+        if getattr(local, "depth", 0):
+            local.depth += 1
+            try:
+                yield self
+            finally:
+                local.depth -= 1
+            return
+        objects, changed, removed = self.__state()
+        before = (dict(objects), set(changed), set(removed))
+        local.depth, local.undo = 1, {}
+        try:
+            yield self
+        except BaseException:
+            local.depth = 0
+            for current, previous in zip((objects, changed, removed),
+                                         before):
+                current.clear()
+                current.update(previous)
+            for obj, attrs in local.undo.values():
+                obj.__dict__.clear()
+                obj.__dict__.update(attrs)
+            raise
+        local.depth = 0
+        self.save()
+
+    def save(self):
+        """writes the changes of the current thread in one transaction, or
+        leaves them to the end of the transaction() it is in"""
+        if getattr(self.__local, "depth", 0):
+            return
+        objects, changed, removed = self.__state()
+        rows = {}
+        for key in changed:
+            name = key.partition('.')[0]
+            obj = objects[key]
+            rows.setdefault(name, []).append(
+                [obj.id] + [getattr(obj, fk, None)
+                            for fk in relations.get(name, ())] +
+                [json.dumps(obj.to_dict())])
+        with self.__connection() as conn:
+            for name, values in rows.items():
+                fks = relations.get(name, ())
+                conn.executemany(
+                    "INSERT OR REPLACE INTO {} (id, {}data) VALUES (?, {}?)".
+                    format(tables[name], "".join(fk + ", " for fk in fks),
+                           "?, " * len(fks)), values)
+            ids = {}
+            for key in removed:
+                name, _, id = key.partition('.')
+                ids.setdefault(name, []).append((id,))
+            for name, values in ids.items():
+                conn.executemany("DELETE FROM {} WHERE id = ?".
+                                 format(tables[name]), values)
+        changed.clear()
+        removed.clear()
+
+    def delete(self, obj=None):
+        """deletes obj on the next save if not None"""
+        if obj is not None:
+            objects, changed, removed = self.__state()
+            key = obj.__class__.__name__ + '.' + obj.id
+            objects.pop(key, None)
+            changed.discard(key)
+            removed.add(key)
+
+    def reload(self):
+        """creates the tables and their indexes if they do not exist"""
+        with self.__connection() as conn:
+            for name, table in tables.items():
+                fks = relations.get(name, ())
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS {} (id VARCHAR(60) PRIMARY "
+                    "KEY, {}data TEXT NOT NULL)".format(
+                        table, "".join(fk + " VARCHAR(60), " for fk in fks)))
+                for fk in fks:
+                    conn.execute("CREATE INDEX IF NOT EXISTS {0}_{1} ON "
+                                 "{0} ({1})".format(table, fk))
+        self.close()
+
+    def close(self):
+        """forgets the objects the current thread looked up, except the
+        ones changed or deleted and not saved yet"""
+        objects, changed, removed = self.__state()
+        for key in list(objects):
+            if key not in changed:
+                del objects[key]
+
+    def changing(self, obj):
+        """records, in a transaction, the attributes of an obj of the current
+        thread about to be set, for a rollback to restore them"""
+        local = self.__local
+        if getattr(local, "depth", 0):
+            key = "{}.{}".format(obj.__class__.__name__,
+                                 getattr(obj, "id", None))
+            if key not in local.undo and self.__state()[0].get(key) is obj:
+                local.undo[key] = (obj, {
+                    name: type(value)(value)
+                    if type(value) in (list, dict) else value
+                    for name, value in vars(obj).items()})
+
+    def touch(self, obj, name):
+        """marks an obj of the current thread as changed after its
+        attribute name was set"""
+        objects, changed = self.__state()[:2]
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", None))
+        if objects.get(key) is obj:
+            changed.add(key)
+
+    def related(self, cls, attr, value):
+        """returns the list of cls objects whose attribute attr is value,
+        e.g. related(City, "state_id", state.id) for the cities of a state"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if attr not in relations.get(cls, ()):
+            return [obj for obj in self.all(cls).values()
+                    if getattr(obj, attr, None) == value]
+        removed = self.__state()[2]
+        related = {}
+        for data, in self.__connection().execute(
+                "SELECT data FROM {} WHERE {} = ?".format(tables[cls], attr),
+                (value,)):
+            obj = self.__build(cls, data)
+            related[cls + '.' + obj.id] = obj
+        for obj in self.__pending(cls):
+            key = cls + '.' + obj.id
+            if getattr(obj, attr, None) == value:
+                related[key] = obj
+            else:
+                related.pop(key, None)
+        return [obj for key, obj in related.items() if key not in removed]
+
+    def get(self, cls, id, load=()):
+        """Return the object based on the class and its ID,
+        or None if not found; load is as for all()"""
+        if cls is None or id is None or cls.__name__ not in classes:
+            return None
+        objects, changed, removed = self.__state()
+        key = cls.__name__ + '.' + id
+        if key in removed:
+            return None
+        if key in objects:
+            return objects[key]
+        row = self.__connection().execute(
+            "SELECT data FROM {} WHERE id = ?".format(
+                tables[cls.__name__]), (id,)).fetchone()
+        return self.__build(cls.__name__, row[0]) if row else None
+
+    def count(self, cls=None):
+        """Return the number of objects in storage matching the given class.
+        If no class is passed, returns the count of all objects in storage"""
+        changed, removed = self.__state()[1:]
+        conn = self.__connection()
+        objN = 0
+        for name in self.__names(cls):
+            if any(key.partition('.')[0] == name
+                   for key in changed | removed):
+                objN += len(self.all(name))
+            else:
+                objN += conn.execute("SELECT COUNT(*) FROM {}".format(
+                    tables[name])).fetchone()[0]
+        return objN
+
+    def counts(self):
+        """Return the number of objects of each class name, counted by a
+        single query unless some have changes not saved yet"""
+        changed, removed = self.__state()[1:]
+        pending = {key.partition('.')[0] for key in changed | removed}
+        counts = dict(self.__connection().execute(" UNION ALL ".join(
+            "SELECT ?, COUNT(*) FROM " + tables[name] for name in classes),
+            list(classes)))
+        for name in pending:
+            counts[name] = len(self.all(name))
+        return counts
+
+    def page(self, cls, after=None, limit=100):
+        """Return at most limit objects of class cls ordered by id, starting
+        after the id after (keyset pagination)"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        removed = {key for key in self.__state()[2]
+                   if key.partition('.')[0] == name}
+        page = {}
+        for data, in self.__connection().execute(
+                "SELECT data FROM {} WHERE id > ? ORDER BY id LIMIT ?".
+                format(tables[name]), (after or "", limit + len(removed))):
+            obj = self.__build(name, data)
+            page[obj.id] = obj
+        for obj in self.__pending(name):
+            if after is None or obj.id > after:
+                page[obj.id] = obj
+        return [page[id] for id in sorted(page)
+                if name + '.' + id not in removed][:limit]
+
+    def iter(self, cls, batch_size=1000):
+        """Yield the objects of class cls ordered by id, querying them
+        batch_size at a time"""
+        after = None
+        while True:
+            batch = self.page(cls, after, batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1].id
+
+    def search_places(self, states=(), cities=(), amenities=()):
+        """Return the places in the states or in the cities given by id,
+        all places if there are neither, having all the amenities given by
+        id that exist"""
+        if states or cities:
+            city_ids = set(cities)
+            for state_id in states:
+                city_ids.update(city.id for city in
+                                self.related(City, "state_id", state_id))
+            places = [place for city_id in city_ids
+                      for place in self.related(Place, "city_id", city_id)]
+        else:
+            places = self.all(Place).values()
+        if amenities:
+            wanted = {id for id in amenities if self.get(Amenity, id)}
+            if not wanted:
+                return []
+            places = [place for place in places
+                      if wanted.issubset(place.amenity_ids)]
+        return list(places)
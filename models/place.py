@@ -4,7 +4,8 @@ import models
 from models.base_model import BaseModel, Base
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Table
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Table, \
+    Index
 from sqlalchemy.orm import relationship
 
 if models.storage_t == 'db':
@@ -16,21 +17,27 @@ if models.storage_t == 'db':
                           Column('amenity_id', String(60),
                                  ForeignKey('amenities.id', onupdate='CASCADE',
                                             ondelete='CASCADE'),
-                                 primary_key=True))
+                                 primary_key=True),
+                          Index('ix_place_amenity_amenity_id', 'amenity_id'))
 
 
 class Place(BaseModel, Base):
     """Representation of Place """
     if models.storage_t == 'db':
         __tablename__ = 'places'
+        # the places of a city, by price, use the composite index
+        __table_args__ = (Index('ix_places_city_id_price_by_night',
+                                'city_id', 'price_by_night'),)
         city_id = Column(String(60), ForeignKey('cities.id'), nullable=False)
-        user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
+        user_id = Column(String(60), ForeignKey('users.id'), nullable=False,
+                         index=True)
         name = Column(String(128), nullable=False)
         description = Column(String(1024), nullable=True)
         number_rooms = Column(Integer, nullable=False, default=0)
         number_bathrooms = Column(Integer, nullable=False, default=0)
-        max_guest = Column(Integer, nullable=False, default=0)
-        price_by_night = Column(Integer, nullable=False, default=0)
+        max_guest = Column(Integer, nullable=False, default=0, index=True)
+        price_by_night = Column(Integer, nullable=False, default=0,
+                                index=True)
         latitude = Column(Float, nullable=True)
         longitude = Column(Float, nullable=True)
         reviews = relationship("Review", backref="place")
@@ -59,20 +66,25 @@ class Place(BaseModel, Base):
         def reviews(self):
             """getter attribute returns the list of Review instances"""
             from models.review import Review
-            review_list = []
-            all_reviews = models.storage.all(Review)
-            for review in all_reviews.values():
-                if review.place_id == self.id:
-                    review_list.append(review)
-            return review_list
+            return models.storage.related(Review, "place_id", self.id)
 
         @property
         def amenities(self):
-            """getter attribute returns the list of Amenity instances"""
+            """getter attribute returns the list of Amenity instances
+            whose ids are in amenity_ids"""
             from models.amenity import Amenity
             amenity_list = []
-            all_amenities = models.storage.all(Amenity)
-            for amenity in all_amenities.values():
-                if amenity.place_id == self.id:
+            for amenity_id in self.amenity_ids:
+                amenity = models.storage.get(Amenity, amenity_id)
+                if amenity is not None:
                     amenity_list.append(amenity)
             return amenity_list
+
+        @amenities.setter
+        def amenities(self, obj):
+            """setter attribute adds the id of the Amenity obj to
+            amenity_ids, assigning a new list so that the storage sees the
+            change"""
+            from models.amenity import Amenity
+            if isinstance(obj, Amenity) and obj.id not in self.amenity_ids:
+                self.amenity_ids = self.amenity_ids + [obj.id]
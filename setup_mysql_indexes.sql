@@ -0,0 +1,36 @@
+-- adds the indexes of the models to an existing database, e.g.
+-- cat setup_mysql_indexes.sql | mysql -uhbnb_dev -p hbnb_dev_db
+-- it can be run any number of times: existing indexes and missing tables
+-- are skipped
+
+DROP PROCEDURE IF EXISTS hbnb_add_index;
+DELIMITER //
+CREATE PROCEDURE hbnb_add_index(tbl VARCHAR(64), idx VARCHAR(64),
+                                cols VARCHAR(255))
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.tables
+               WHERE table_schema = DATABASE() AND table_name = tbl)
+       AND NOT EXISTS (SELECT 1 FROM information_schema.statistics
+                       WHERE table_schema = DATABASE() AND
+                             table_name = tbl AND index_name = idx) THEN
+        SET @ddl = CONCAT('CREATE INDEX `', idx, '` ON `', tbl, '` (', cols,
+                          ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+CALL hbnb_add_index('cities', 'ix_cities_state_id', 'state_id');
+CALL hbnb_add_index('places', 'ix_places_city_id_price_by_night',
+                    'city_id, price_by_night');
+CALL hbnb_add_index('places', 'ix_places_user_id', 'user_id');
+CALL hbnb_add_index('places', 'ix_places_max_guest', 'max_guest');
+CALL hbnb_add_index('places', 'ix_places_price_by_night', 'price_by_night');
+CALL hbnb_add_index('reviews', 'ix_reviews_place_id', 'place_id');
+CALL hbnb_add_index('reviews', 'ix_reviews_user_id', 'user_id');
+CALL hbnb_add_index('place_amenity', 'ix_place_amenity_amenity_id',
+                    'amenity_id');
+
+DROP PROCEDURE hbnb_add_index;
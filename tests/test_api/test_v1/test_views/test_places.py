@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+"""
+Contains the TestPlacesDocs and TestPlacesSearch classes
+"""
+
+from api.v1.app import app
+from api.v1.views import places
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+import os
+import pep8
+import unittest
+
+
+class TestPlacesDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the places views"""
+
+    def test_pep8_conformance_places(self):
+        """Test that api/v1/views/places.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/places.py',
+                                    'tests/test_api/test_v1/test_views/\
+test_places.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_places_module_docstring(self):
+        """Test for the places.py module docstring"""
+        self.assertIsNot(places.__doc__, None,
+                         "places.py needs a docstring")
+
+
+class TestPlacesSearch(unittest.TestCase):
+    """Test the /places_search route"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.client = app.test_client()
+        self.user = User(email="search@hbnb.io", password="pwd")
+        self.state = State(name="state_name")
+        self.city = City(name="city_name", state_id=self.state.id)
+        self.place = Place(name="place", city_id=self.city.id,
+                           user_id=self.user.id)
+        self.objs = [self.user, self.state, self.city, self.place]
+        for obj in self.objs:
+            obj.save()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        for obj in reversed(self.objs):
+            models.storage.delete(obj)
+        models.storage.save()
+        models.storage.close()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def search(self, body):
+        """posts body to /places_search"""
+        return self.client.post("/api/v1/places_search", json=body)
+
+    def test_empty_body(self):
+        """Test that an empty object or list returns all places"""
+        for body in ({}, []):
+            with self.subTest(body=body):
+                response = self.search(body)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(self.place.id,
+                              [place["id"] for place in response.json])
+
+    def test_not_an_object(self):
+        """Test that a body that is not a JSON object is refused"""
+        for body in ([self.state.id], "states", 1):
+            with self.subTest(body=body):
+                self.assertEqual(self.search(body).status_code, 400)
+        response = self.client.post("/api/v1/places_search", data="{",
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_by_state(self):
+        """Test that the places of a state are found"""
+        response = self.search({"states": [self.state.id]})
+        self.assertEqual([place["id"] for place in response.json],
+                         [self.place.id])
+
+    def test_ids_not_strings(self):
+        """Test that the ids that are not strings are ignored"""
+        for body in ({"states": [["x"]]}, {"amenities": [{}]},
+                     {"cities": [1, None]}):
+            with self.subTest(body=body):
+                response = self.search(body)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(self.place.id,
+                              [place["id"] for place in response.json])
+        response = self.search({"states": [["x"], self.state.id]})
+        self.assertEqual([place["id"] for place in response.json],
+                         [self.place.id])
+
+if __name__ == "__main__":
+    unittest.main()
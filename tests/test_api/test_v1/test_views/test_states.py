@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""
+Contains the TestStatesDocs and TestStatesUpdate classes
+"""
+
+from api.v1.app import app
+from api.v1.views import states
+import models
+from models.city import City
+from models.state import State
+import os
+import pep8
+import unittest
+
+
+class TestStatesDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the states views"""
+
+    def test_pep8_conformance_states(self):
+        """Test that api/v1/views/states.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/states.py',
+                                    'tests/test_api/test_v1/test_views/\
+test_states.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_states_module_docstring(self):
+        """Test for the states.py module docstring"""
+        self.assertIsNot(states.__doc__, None,
+                         "states.py needs a docstring")
+
+
+class TestStatesUpdate(unittest.TestCase):
+    """Test the PUT and PATCH /states/<state_id> routes"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.client = app.test_client()
+        self.state = State(name="Cairo")
+        self.city = City(name="Giza", state_id=self.state.id)
+        self.objs = [self.state, self.city]
+        for obj in self.objs:
+            obj.save()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        models.storage.close()
+        for obj in reversed(self.objs):
+            models.storage.delete(models.storage.get(type(obj), obj.id))
+        models.storage.save()
+        models.storage.close()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def stored(self):
+        """returns the state as read back from the storage"""
+        models.storage.close()
+        return models.storage.get(State, self.state.id)
+
+    def test_put_and_patch(self):
+        """Test that PUT and PATCH change the given attributes only"""
+        created_at = self.state.to_dict()["created_at"]
+        for method, name in (("put", "Alexandria"), ("patch", "Luxor")):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(
+                    "/api/v1/states/" + self.state.id,
+                    json={"name": name, "id": "12345",
+                          "created_at": "2000-01-01T00:00:00.000000"})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json["name"], name)
+                self.assertEqual(response.json["id"], self.state.id)
+                self.assertEqual(response.json["created_at"], created_at)
+                state = self.stored()
+                self.assertEqual(state.name, name)
+                self.assertEqual([city.id for city in state.cities],
+                                 [self.city.id])
+                models.storage.close()
+
+    def test_update_any_key(self):
+        """Test that a body with any key, even one named like an argument
+        of storage.update, is set as an attribute"""
+        response = self.client.put("/api/v1/states/" + self.state.id,
+                                   json={"obj": "x", "changes": "y"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json["obj"], response.json["changes"]),
+                         ("x", "y"))
+
+    def test_update_errors(self):
+        """Test that an unknown id is not found and a body that is not
+        JSON is refused"""
+        response = self.client.put("/api/v1/states/12345",
+                                   json={"name": "x"})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.patch("/api/v1/states/" + self.state.id,
+                                     data="{",
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored().name, "Cairo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,20 @@
 #!/usr/bin/python3
 """
-Contains the class TestConsoleDocs
+Contains the classes TestConsoleDocs, TestConsoleImport and
+TestConsoleDestroy
 """
 
 import console
 import inspect
+import io
+import json
+import models
+from models.state import State
+import os
 import pep8
+import tempfile
 import unittest
+from unittest import mock
 HBNBCommand = console.HBNBCommand
 
 
@@ -39,3 +47,137 @@ class TestConsoleDocs(unittest.TestCase):
                          "HBNBCommand class needs a docstring")
         self.assertTrue(len(HBNBCommand.__doc__) >= 1,
                         "HBNBCommand class needs a docstring")
+
+
+def run(line):
+    """returns what the console prints for the command line"""
+    with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+        HBNBCommand().onecmd(line)
+    return out.getvalue()
+
+
+class TestConsoleImport(unittest.TestCase):
+    """Test the import command of the console"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.states = [State(name=str(i)) for i in range(3)]
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        models.storage.close()
+        for state in self.states:
+            models.storage.delete(models.storage.get(State, state.id))
+        models.storage.save()
+        models.storage.close()
+        self.dir.cleanup()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def write(self, records):
+        """writes records as JSON to a file and returns its name"""
+        name = os.path.join(self.dir.name, "import.json")
+        with open(name, "w") as f:
+            json.dump(records, f)
+        return name
+
+    def names(self):
+        """returns the names of the imported states in storage"""
+        models.storage.close()
+        return sorted(state.name for state in
+                      models.storage.all(State).values()
+                      if state.id in {state.id for state in self.states})
+
+    def test_import_list(self):
+        """Test that a list of dictionaries is imported"""
+        name = self.write([state.to_dict() for state in self.states])
+        self.assertEqual(run("import " + name), "3\n")
+        self.assertEqual(self.names(), ["0", "1", "2"])
+
+    def test_import_dict(self):
+        """Test that a dictionary like file.json is imported"""
+        name = self.write({"State." + state.id: state.to_dict()
+                           for state in self.states})
+        self.assertEqual(run("import " + name), "3\n")
+        self.assertEqual(self.names(), ["0", "1", "2"])
+
+    def test_import_errors(self):
+        """Test the messages of a missing, unreadable or unknown file and
+        of an unknown class, which import nothing"""
+        self.assertEqual(run("import"), "** file name missing **\n")
+        self.assertEqual(run("import " + os.path.join(self.dir.name, "no")),
+                         "** file can't be read **\n")
+        name = os.path.join(self.dir.name, "bad.json")
+        with open(name, "w") as f:
+            f.write("[{")
+        self.assertEqual(run("import " + name), "** file can't be read **\n")
+        for scalar in (5, "states", None):
+            self.assertEqual(run("import " + self.write(scalar)),
+                             "** file can't be read **\n")
+        records = [state.to_dict() for state in self.states]
+        records[1]["__class__"] = "Unknown"
+        self.assertEqual(run("import " + self.write(records)),
+                         "** class doesn't exist **\n")
+        self.assertEqual(self.names(), [])
+
+
+class TestConsoleDestroy(unittest.TestCase):
+    """Test the destroy command of the console"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.states = [State(name=str(i)) for i in range(3)]
+        for state in self.states:
+            models.storage.new(state)
+        models.storage.save()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        for state in self.states:
+            models.storage.delete(state)
+        models.storage.save()
+        models.storage.close()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def ids(self):
+        """returns the ids of the states of setUp still in storage"""
+        models.storage.close()
+        return {state.id for state in self.states
+                if models.storage.get(State, state.id) is not None}
+
+    def test_destroy_ids(self):
+        """Test that destroy deletes the instances of several ids"""
+        line = "destroy State {} {} 12345".format(self.states[0].id,
+                                                  self.states[1].id)
+        self.assertEqual(run(line), "")
+        self.assertEqual(self.ids(), {self.states[2].id})
+
+    def test_destroy_unknown_ids(self):
+        """Test that destroy of ids none of which exists says so"""
+        self.assertEqual(run("destroy State 12345 67890"),
+                         "** no instance found **\n")
+        self.assertEqual(run("destroy Unknown 12345 67890"),
+                         "** class doesn't exist **\n")
+        self.assertEqual(len(self.ids()), 3)
@@ -151,3 +151,18 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.new.called)
         self.assertTrue(mock_storage.save.called)
+
+    @mock.patch('models.storage')
+    def test_assign(self, mock_storage):
+        """Test that assign sets the attributes that differ, except the
+        protected ones, and updates `updated_at` if any did"""
+        inst = BaseModel(name="old", number=1)
+        old_id, old_updated_at = inst.id, inst.updated_at
+        self.assertEqual(inst.assign({"name": "old", "number": 1}), [])
+        self.assertEqual(inst.updated_at, old_updated_at)
+        self.assertEqual(inst.assign({"name": "new", "number": 1,
+                                      "id": "1", "__class__": "State"}),
+                         ["name"])
+        self.assertEqual((inst.name, inst.id), ("new", old_id))
+        self.assertIs(type(inst), BaseModel)
+        self.assertNotEqual(inst.updated_at, old_updated_at)
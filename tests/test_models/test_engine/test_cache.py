@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+Contains the TestLRUCacheDocs and TestLRUCache classes
+"""
+
+import inspect
+from models.engine import cache
+import pep8
+import unittest
+from unittest import mock
+LRUCache = cache.LRUCache
+
+
+class TestLRUCacheDocs(unittest.TestCase):
+    """Tests to check the documentation and style of LRUCache class"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.lru_f = inspect.getmembers(LRUCache, inspect.isfunction)
+
+    def test_pep8_conformance_cache(self):
+        """Test that models/engine/cache.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/cache.py',
+                                    'tests/test_models/test_engine/\
+test_cache.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_cache_module_docstring(self):
+        """Test for the cache.py module docstring"""
+        self.assertIsNot(cache.__doc__, None,
+                         "cache.py needs a docstring")
+        self.assertTrue(len(cache.__doc__) >= 1,
+                        "cache.py needs a docstring")
+
+    def test_lru_func_docstrings(self):
+        """Test for the presence of docstrings in LRUCache methods"""
+        for func in self.lru_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the LRUCache class"""
+
+    def test_hits_and_misses(self):
+        """Test that get counts its hits and misses"""
+        lru = LRUCache(2, 60)
+        self.assertIsNone(lru.get("a"))
+        lru.put("a", 1)
+        self.assertEqual(lru.get("a"), 1)
+        self.assertEqual(lru.stats(), {"size": 1, "maxsize": 2, "hits": 1,
+                                       "misses": 1})
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used value makes room"""
+        lru = LRUCache(2, 60)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        lru.get("a")
+        lru.put("c", 3)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual((lru.get("a"), lru.get("c")), (1, 3))
+
+    def test_expires(self):
+        """Test that a value is missing ttl seconds after it was put"""
+        lru = LRUCache(2, 10)
+        with mock.patch.object(cache.time, "monotonic", return_value=100):
+            lru.put("a", 1)
+        with mock.patch.object(cache.time, "monotonic", return_value=109):
+            self.assertEqual(lru.get("a"), 1)
+        with mock.patch.object(cache.time, "monotonic", return_value=110):
+            self.assertIsNone(lru.get("a"))
+        self.assertEqual(lru.stats()["size"], 0)
+
+    def test_pop_and_clear(self):
+        """Test that pop and clear forget the values"""
+        lru = LRUCache(2, 60)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        lru.pop("a")
+        lru.pop("missing")
+        self.assertIsNone(lru.get("a"))
+        lru.clear()
+        self.assertIsNone(lru.get("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
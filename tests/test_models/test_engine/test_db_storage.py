@@ -12,9 +12,13 @@ from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+import os
 import pep8
+import re
 import unittest
-from sqlalchemy import text
+from unittest import mock
+import sqlalchemy
+from sqlalchemy import event, text
 from sqlalchemy.orm import sessionmaker
 from models import storage
 from models.base_model import Base
@@ -191,6 +195,485 @@ class TestDBStorageGetMethod(unittest.TestCase):
         self.assertEqual(storage.count(), 4)
         self.assertEqual(storage.count(), len(storage.all()))
 
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_counts(self):
+        """Test counts of every class in a single query"""
+        before = storage.counts()
+        self.assertEqual(set(before), set(classes))
+        state = State(name="state_name")
+        state.save()
+        City(name="city_name", state_id=state.id).save()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, many):
+            """records the statements run"""
+            statements.append(statement)
+        engine = storage._DBStorage__engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            after = storage.counts()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(after["State"], before["State"] + 1)
+        self.assertEqual(after["City"], before["City"] + 1)
+        self.assertEqual(after["City"], storage.count(City))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_page_and_iter(self):
+        """Test keyset pagination and iteration in id order"""
+        for i in range(5):
+            Amenity(name="amenity_{}".format(i)).save()
+        ids = sorted(storage.all(Amenity))
+        ids = [key.split('.')[1] for key in ids]
+        self.assertEqual([obj.id for obj in storage.page(Amenity, limit=2)],
+                         ids[:2])
+        self.assertEqual([obj.id for obj in
+                          storage.page(Amenity, ids[1], 2)], ids[2:4])
+        self.assertEqual([obj.id for obj in
+                          storage.iter(Amenity, batch_size=2)], ids)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_eager_load(self):
+        """Test that all and get load the requested relationships"""
+        state = State(name="state_name")
+        state.save()
+        City(name="city_name", state_id=state.id).save()
+        storage.close()
+        states = storage.all(State, load=["cities.places"])
+        loaded = states["State." + state.id]
+        self.assertIn("cities", loaded.__dict__)
+        self.assertIn("places", loaded.__dict__["cities"][0].__dict__)
+        storage.close()
+        loaded = storage.get(City, loaded.cities[0].id, load=["state"])
+        self.assertIn("state", loaded.__dict__)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_search_places(self):
+        """Test search_places by states, cities and all amenities"""
+        user = User(email="search@hbnb.io", password="pwd")
+        user.save()
+        wifi, pool = Amenity(name="wifi"), Amenity(name="pool")
+        wifi.save()
+        pool.save()
+        state = State(name="state_name")
+        state.save()
+        city = City(name="city_name", state_id=state.id)
+        city.save()
+        both = Place(name="both", city_id=city.id, user_id=user.id)
+        both.amenities.extend([wifi, pool])
+        both.save()
+        one = Place(name="one", city_id=city.id, user_id=user.id)
+        one.amenities.append(wifi)
+        one.save()
+        search = storage.search_places
+        self.assertCountEqual(search(states=[state.id]), [both, one])
+        self.assertEqual(search(cities=[city.id],
+                                amenities=[wifi.id, pool.id]), [both])
+        self.assertCountEqual(search(states=[state.id],
+                                     amenities=[wifi.id, "unknown"]),
+                              [both, one])
+        self.assertEqual(search(states=["unknown"]), [])
+
+
+class TestDBStoragePool(unittest.TestCase):
+    """Test the connection pool settings and statistics, on SQLite"""
+
+    def setUp(self):
+        """Set up test methods"""
+        env = {"HBNB_MYSQL_URL": "sqlite:///test_pool.db",
+               "HBNB_MYSQL_POOL_SIZE": "2", "HBNB_MYSQL_MAX_OVERFLOW": "1",
+               "HBNB_MYSQL_POOL_TIMEOUT": "0.1",
+               "HBNB_MYSQL_POOL_RECYCLE": "60",
+               "HBNB_MYSQL_POOL_PRE_PING": "0", "HBNB_ENV": ""}
+        with mock.patch.dict(os.environ, env):
+            self.storage = DBStorage()
+        self.engine = self.storage._DBStorage__engine
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.engine.dispose()
+        try:
+            os.remove("test_pool.db")
+        except OSError:
+            pass
+
+    def test_pool_settings(self):
+        """Test that the pool is configured from the environment"""
+        pool = self.engine.pool
+        self.assertIsInstance(pool, db_storage.TimedQueuePool)
+        self.assertEqual(pool.size(), 2)
+        self.assertEqual(pool._max_overflow, 1)
+        self.assertEqual(pool._recycle, 60)
+        self.assertFalse(pool._pre_ping)
+
+    def test_pool_stats(self):
+        """Test the checked out connections, overflow and checkouts"""
+        self.assertEqual(self.storage.pool_stats(),
+                         {"size": 2, "checked_in": 0, "checked_out": 0,
+                          "overflow": 0, "checkouts": 0, "wait_time": 0.0,
+                          "max_wait": 0.0})
+        conns = [self.engine.connect() for i in range(3)]
+        stats = self.storage.pool_stats()
+        self.assertEqual(stats["checked_out"], 3)
+        self.assertEqual(stats["overflow"], 1)
+        self.assertEqual(stats["checkouts"], 3)
+        with self.assertRaises(sqlalchemy.exc.TimeoutError):
+            self.engine.connect()
+        self.assertGreaterEqual(self.storage.pool_stats()["max_wait"], 0.1)
+        for conn in conns:
+            conn.close()
+        stats = self.storage.pool_stats()
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["checked_in"], 2)
+
+
+class TestDBStorageIndexes(unittest.TestCase):
+    """Test the indexes of the tables, on SQLite"""
+
+    def setUp(self):
+        """Set up test methods"""
+        with mock.patch.dict(os.environ,
+                             {"HBNB_MYSQL_URL": "sqlite:///test_indexes.db"}):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.engine = self.storage._DBStorage__engine
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.storage.close()
+        self.engine.dispose()
+        try:
+            os.remove("test_indexes.db")
+        except OSError:
+            pass
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_upgrade_script(self):
+        """Test that setup_mysql_indexes.sql adds the indexes of the
+        models"""
+        with open("setup_mysql_indexes.sql") as f:
+            calls = re.findall(r"CALL hbnb_add_index\('(\w+)', '(\w+)',"
+                               r"\s*'([\w, ]+)'\);", f.read())
+        self.assertEqual(
+            {(table, name, tuple(cols.split(", ")))
+             for table, name, cols in calls},
+            {(table.name, index.name, tuple(col.name for col in index.columns))
+             for table in Base.metadata.sorted_tables
+             for index in table.indexes})
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_queries_use_indexes(self):
+        """Test with EXPLAIN QUERY PLAN that the relationship and search
+        queries look the rows up by index"""
+        storage = self.storage
+        user = User(email="explain@hbnb.io", password="pwd")
+        state = State(name="state_name")
+        city = City(name="city_name", state_id=state.id)
+        place = Place(name="place", city_id=city.id, user_id=user.id)
+        wifi = Amenity(name="wifi")
+        place.amenities.append(wifi)
+        review = Review(text="text", place_id=place.id, user_id=user.id)
+        for obj in (user, state, city, place, wifi, review):
+            storage.new(obj)
+        storage.save()
+        storage.close()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, many):
+            """records the statements run"""
+            statements.append((statement, parameters))
+        event.listen(self.engine, "before_cursor_execute", record)
+        state = storage.get(State, state.id)
+        self.assertEqual(len(state.cities[0].places[0].reviews), 1)
+        self.assertEqual(len(storage.search_places(states=[state.id],
+                                                   amenities=[wifi.id])), 1)
+        event.remove(self.engine, "before_cursor_execute", record)
+        with self.engine.connect() as conn:
+            plans = " ".join(
+                str(row[-1]) for statement, parameters in statements
+                for row in conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters))
+        for index in ("ix_cities_state_id", "ix_places_city_id_price_by_night",
+                      "ix_reviews_place_id", "ix_place_amenity_amenity_id"):
+            with self.subTest(index=index):
+                self.assertIn(index, plans)
+
+
+class TestDBStorageCache(unittest.TestCase):
+    """Test the cache of get(), on SQLite"""
+
+    def setUp(self):
+        """Set up test methods"""
+        env = {"HBNB_MYSQL_URL": "sqlite:///test_cache.db",
+               "HBNB_MYSQL_CACHE_SIZE": "2", "HBNB_MYSQL_CACHE_TTL": "60"}
+        with mock.patch.dict(os.environ, env):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.engine = self.storage._DBStorage__engine
+        self.selects = 0
+        event.listen(self.engine, "before_cursor_execute", self.count)
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.storage.close()
+        self.engine.dispose()
+        try:
+            os.remove("test_cache.db")
+        except OSError:
+            pass
+
+    def count(self, conn, cursor, statement, parameters, context, many):
+        """counts the SELECT statements run"""
+        self.selects += statement.startswith("SELECT")
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_is_cached_across_sessions(self):
+        """Test that a second get in another session does not query"""
+        state = State(name="Cairo")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "Cairo")
+        self.storage.close()
+        selects = self.selects
+        got = self.storage.get(State, state.id)
+        self.assertEqual(self.selects, selects)
+        self.assertEqual(got.name, "Cairo")
+        self.assertEqual(got.cities, [])
+        self.assertIsNone(self.storage.get(State, "12345"))
+        stats = self.storage.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_keeps_changes_not_flushed(self):
+        """Test that a cached get returns the object of the session with its
+        changes rather than the cached columns"""
+        state = State(name="Cairo")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.storage.get(State, state.id)
+        self.storage.close()
+        got = self.storage.get(State, state.id)
+        got.name = "Giza"
+        self.assertIs(self.storage.get(State, state.id), got)
+        self.assertEqual(got.name, "Giza")
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "Giza")
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_writes_invalidate(self):
+        """Test that save and delete drop the objects from the cache"""
+        state = State(name="Cairo")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        got = self.storage.get(State, state.id)
+        got.name = "Giza"
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "Giza")
+        self.storage.close()
+        self.storage.delete(self.storage.get(State, state.id))
+        self.storage.save()
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, state.id))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk_writes_invalidate(self):
+        """Test that bulk_new and bulk_delete drop the objects from the
+        cache"""
+        states = [State(name=str(i)) for i in range(2)]
+        self.storage.new(states[0])
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, states[0].id).name, "0")
+        self.storage.close()
+        states[0].name = "changed"
+        self.storage.bulk_new(states)
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, states[0].id).name,
+                         "changed")
+        self.storage.close()
+        self.assertEqual(self.storage.bulk_delete(
+            State, [state.id for state in states]), 2)
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, states[0].id))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_disabled(self):
+        """Test that there is no cache by default"""
+        with mock.patch.dict(os.environ,
+                             {"HBNB_MYSQL_URL": "sqlite:///test_cache.db"}):
+            self.assertIsNone(DBStorage().cache_stats())
+
+
+class TestDBStorageBulk(unittest.TestCase):
+    """Test bulk_new and bulk_delete, on SQLite"""
+
+    def setUp(self):
+        """Set up test methods"""
+        with mock.patch.dict(os.environ,
+                             {"HBNB_MYSQL_URL": "sqlite:///test_bulk.db"}):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.engine = self.storage._DBStorage__engine
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.record)
+
+    def tearDown(self):
+        """Tear down test methods"""
+        event.remove(self.engine, "before_cursor_execute", self.record)
+        self.storage.close()
+        self.engine.dispose()
+        try:
+            os.remove("test_bulk.db")
+        except OSError:
+            pass
+
+    def record(self, conn, cursor, statement, parameters, context, many):
+        """records the statements run"""
+        self.statements.append(statement)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk_new_and_delete(self):
+        """Test that bulk_new inserts and bulk_delete deletes the objects
+        with a statement each"""
+        states = [State(name=str(i)) for i in range(50)]
+        self.storage.bulk_new(states)
+        self.assertEqual(len([statement for statement in self.statements
+                              if statement.startswith("INSERT")]), 1)
+        self.storage.close()
+        self.assertEqual(self.storage.count(State), 50)
+        self.assertEqual(self.storage.bulk_delete(
+            State, [state.id for state in states[:10]] + ["12345"]), 10)
+        self.assertEqual(len([statement for statement in self.statements
+                              if statement.startswith("DELETE")]), 1)
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, states[0].id))
+        self.assertEqual(self.storage.count(State), 40)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk_new_existing_id(self):
+        """Test that bulk_new overwrites the rows of the ids already
+        stored, as the other engines do, and inserts the others"""
+        state = State(name="Cairo")
+        self.storage.bulk_new([state])
+        self.storage.close()
+        again = State(id=state.id, name="Giza",
+                      created_at=state.created_at.isoformat())
+        self.storage.bulk_new([again, State(name="Luxor")])
+        self.storage.close()
+        self.assertEqual(self.storage.count(State), 2)
+        self.assertEqual(self.storage.get(State, state.id).name, "Giza")
+
+
+class TestDBStorageUpdate(unittest.TestCase):
+    """Test update of DBStorage, on SQLite"""
+
+    def setUp(self):
+        """Set up test methods"""
+        with mock.patch.dict(os.environ,
+                             {"HBNB_MYSQL_URL": "sqlite:///test_update.db"}):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.engine = self.storage._DBStorage__engine
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.storage.close()
+        self.engine.dispose()
+        try:
+            os.remove("test_update.db")
+        except OSError:
+            pass
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_update(self):
+        """Test that update issues a single UPDATE of the changed columns,
+        keeping the relationships"""
+        state = State(name="Cairo")
+        city = City(name="city", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, many):
+            """records the statements run"""
+            statements.append(statement)
+        event.listen(self.engine, "before_cursor_execute", record)
+        self.storage.update(state, {"name": "Giza"})
+        self.storage.update(state, {"name": "Giza"})
+        event.remove(self.engine, "before_cursor_execute", record)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("UPDATE states SET name"))
+        self.storage.close()
+        state = self.storage.get(State, state.id)
+        self.assertEqual(state.name, "Giza")
+        self.assertEqual([c.id for c in state.cities], [city.id])
+
+
+class TestDBStorageTransaction(unittest.TestCase):
+    """Test the transactions of DBStorage, on SQLite"""
+
+    def setUp(self):
+        """Set up test methods"""
+        with mock.patch.dict(os.environ, {"HBNB_MYSQL_URL":
+                                          "sqlite:///test_transaction.db"}):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.engine = self.storage._DBStorage__engine
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.storage.close()
+        self.engine.dispose()
+        try:
+            os.remove("test_transaction.db")
+        except OSError:
+            pass
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_transaction(self):
+        """Test that a transaction commits at its end, or rolls back on an
+        exception"""
+        with self.storage.transaction():
+            state = State(name="new")
+            self.storage.new(state)
+            self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.count(State), 1)
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                self.storage.delete(self.storage.get(State, state.id))
+                self.storage.save()
+                self.storage.new(State(name="rolled back"))
+                raise ValueError
+        self.storage.close()
+        self.assertEqual([state.name for state in
+                          self.storage.all(State).values()], ["new"])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_transaction_rolls_back_attributes(self):
+        """Test that an exception undoes the attributes set in the
+        transaction, which are not saved afterwards"""
+        state = State(name="a")
+        self.storage.new(state)
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                state.name = "b"
+                self.storage.save()
+                raise ValueError
+        self.assertEqual(state.name, "a")
+        self.storage.new(State(name="other"))
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "a")
+
 
 if __name__ == "__main__":
     unittest.main()
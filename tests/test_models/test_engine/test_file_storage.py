@@ -6,7 +6,7 @@ Contains the TestFileStorageDocs classes
 from models import storage
 import inspect
 import models
-from models.engine import file_storage
+from models.engine import file_storage, serializers
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,7 +17,13 @@ from models.user import User
 import json
 import os
 import pep8
+import shutil
+import subprocess
+import sys
+import threading
+import time
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -70,7 +76,8 @@ test_file_storage.py'])
 
 class TestFileStorage(unittest.TestCase):
     """Test the FileStorage class"""
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
     def test_all_returns_dict(self):
         """Test that all returns the FileStorage.__objects attr"""
         storage = FileStorage()
@@ -78,7 +85,8 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(type(new_dict), dict)
         self.assertIs(new_dict, storage._FileStorage__objects)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
     def test_new(self):
         """test that new adds an object to the FileStorage.__objects attr"""
         storage = FileStorage()
@@ -94,7 +102,8 @@ class TestFileStorage(unittest.TestCase):
                 self.assertEqual(test_dict, storage._FileStorage__objects)
         FileStorage._FileStorage__objects = save
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
     def test_save(self):
         """Test that save properly saves objects to file.json"""
         storage = FileStorage()
@@ -139,37 +148,44 @@ class TestFileStorageGetMethod(unittest.TestCase):
             pass
         FileStorage._FileStorage__objects = {}
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_amenity_wrong_id(self):
         """test get with amenity with wrong id"""
         self.assertEqual(storage.get(Amenity, '12345'), None)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_city_wrong_id(self):
         """test get with city with wrong id"""
         self.assertEqual(storage.get(City, '12345'), None)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_place_wrong_id(self):
         """test get with place with wrong id"""
         self.assertEqual(storage.get(Place, '12345'), None)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_review_wrong_id(self):
         """test get with review with wrong id"""
         self.assertEqual(storage.get(Review, '12345'), None)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_state_wrong_id(self):
         """test get with state with wrong id"""
         self.assertEqual(storage.get(State, '12345'), None)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_user_wrong_id(self):
         """test get with user with wrong id"""
         self.assertEqual(storage.get(User, '12345'), None)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_amenity_valid_id(self):
         """test get with amenity with valid id"""
         amenity = Amenity()
@@ -177,7 +193,8 @@ class TestFileStorageGetMethod(unittest.TestCase):
         amenity_from_get = storage.get(Amenity, amenity.id)
         self.assertEqual(amenity_from_get.to_dict(), amenity.to_dict())
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_city_valid_id(self):
         """test get with city with valid id"""
         city = City()
@@ -185,7 +202,8 @@ class TestFileStorageGetMethod(unittest.TestCase):
         city_from_get = storage.get(City, city.id)
         self.assertEqual(city_from_get.to_dict(), city.to_dict())
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_place_valid_id(self):
         """test get with place with valid id"""
         place = Place()
@@ -193,7 +211,8 @@ class TestFileStorageGetMethod(unittest.TestCase):
         place_from_get = storage.get(Place, place.id)
         self.assertEqual(place_from_get.to_dict(), place.to_dict())
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_review_valid_id(self):
         """test get with Reviestate with valid id"""
         review = Review()
@@ -201,7 +220,8 @@ class TestFileStorageGetMethod(unittest.TestCase):
         review_from_get = storage.get(Review, review.id)
         self.assertEqual(review_from_get.to_dict(), review.to_dict())
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_state_valid_id(self):
         """test get with state with valid id"""
         state = State()
@@ -209,7 +229,8 @@ class TestFileStorageGetMethod(unittest.TestCase):
         state_from_get = storage.get(State, state.id)
         self.assertEqual(state_from_get.to_dict(), state.to_dict())
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_get_with_user_valid_id(self):
         """test get with user with valid id"""
         user = User()
@@ -243,7 +264,8 @@ class TestFileStorageCountMethod(unittest.TestCase):
         except IOError:
             pass
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_without_cls(self):
         """Test count without cls"""
         amenity = Amenity()
@@ -261,7 +283,50 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertEqual(storage.count(), 6)
         self.assertEqual(storage.count(), len(storage.all()))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
+    def test_page_and_iter(self):
+        """Test keyset pagination and iteration in id order"""
+        states = sorted((State() for i in range(7)), key=lambda s: s.id)
+        for state in states:
+            storage.new(state)
+        storage.new(City())
+        self.assertEqual(storage.page(State, limit=3), states[:3])
+        self.assertEqual(storage.page("State", states[2].id, 3), states[3:6])
+        self.assertEqual(storage.page(State, states[6].id), [])
+        storage.delete(states[4])
+        self.assertEqual(storage.page(State, states[2].id, 3),
+                         [states[3], states[5], states[6]])
+        iterated = []
+        for state in storage.iter(State, batch_size=2):
+            iterated.append(state)
+            if state is states[1]:
+                storage.delete(states[2])
+        self.assertEqual(iterated, [states[0], states[1], states[3],
+                                    states[5], states[6]])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
+    def test_load_is_accepted(self):
+        """Test that all and get accept the relationships to load"""
+        state = State()
+        storage.new(state)
+        self.assertEqual(storage.all(State, load=["cities.places"]),
+                         storage.all(State))
+        self.assertIs(storage.get(State, state.id, load=["cities"]), state)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
+    def test_counts(self):
+        """Test counts of every class"""
+        for cls in (Amenity, City, City, User):
+            cls().save()
+        self.assertEqual(storage.counts(),
+                         {"Amenity": 1, "BaseModel": 0, "City": 2,
+                          "Place": 0, "Review": 0, "State": 0, "User": 1})
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_with_amenity_cls(self):
         """Test count with amenity cls"""
         amenity = Amenity()
@@ -280,7 +345,8 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertEqual(storage.count(Amenity), 1)
         self.assertNotEqual(storage.count(Amenity), len(storage.all()))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_with_city_cls(self):
         """Test count with city cls"""
         amenity = Amenity()
@@ -298,7 +364,8 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertEqual(storage.count(City), 1)
         self.assertNotEqual(storage.count(City), len(storage.all()))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_with_place_cls(self):
         """Test count with place cls"""
         amenity = Amenity()
@@ -316,7 +383,8 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertEqual(storage.count(Place), 1)
         self.assertNotEqual(storage.count(Place), len(storage.all()))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_with_review_cls(self):
         """Test count with review cls"""
         amenity = Amenity()
@@ -334,7 +402,8 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertEqual(storage.count(Review), 1)
         self.assertNotEqual(storage.count(Review), len(storage.all()))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_with_state_cls(self):
         """Test count with state cls"""
         amenity = Amenity()
@@ -352,7 +421,8 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertEqual(storage.count(State), 1)
         self.assertNotEqual(storage.count(State), len(storage.all()))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing db storage")
     def test_count_with_user_cls(self):
         """Test count with user cls"""
         amenity = Amenity()
@@ -371,5 +441,1125 @@ class TestFileStorageCountMethod(unittest.TestCase):
         self.assertNotEqual(storage.count(User), len(storage.all()))
 
 
+class TestFileStorageReload(unittest.TestCase):
+    """Unittests for the change-detecting reload of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_close_skips_unchanged_file(self):
+        """Test that close does not re-read a file it wrote itself"""
+        storage = FileStorage()
+        State().save()
+        with mock.patch.object(serializers, "read",
+                               wraps=serializers.read) as load:
+            storage.close()
+            storage.reload()
+        self.assertEqual(load.call_count, 0)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_picks_up_external_change(self):
+        """Test that reload re-reads a file modified by someone else"""
+        storage = FileStorage()
+        State().save()
+        state = State(name="Cairo")
+        key = "State." + state.id
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        js[key] = state.to_dict()
+        with open("file.json", "w") as f:
+            json.dump(js, f)
+        storage.close()
+        self.assertIn(key, storage.all())
+        self.assertEqual(storage.all()[key].name, "Cairo")
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_does_not_call_attribute_hooks(self):
+        """Test that setting the attributes of the objects reload builds
+        does not call the storage, which only hears of stored objects"""
+        storage = FileStorage()
+        for i in range(3):
+            storage.new(State(name=str(i)))
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        with mock.patch.object(FileStorage, "touch") as touch, \
+                mock.patch.object(FileStorage, "changing") as changing:
+            storage.reload()
+            state = State(name="not stored")
+            state.name = "still not stored"
+            self.assertEqual((touch.call_count, changing.call_count), (0, 0))
+            stored = list(storage.all(State).values())[0]
+            stored.name = "changed"
+        touch.assert_called_once_with(stored, "name")
+        changing.assert_called_once_with(stored)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_always_mode(self):
+        """Test that the always mode re-reads the file on every call"""
+        storage = FileStorage()
+        State().save()
+        with mock.patch.object(FileStorage, "_FileStorage__reload_mode",
+                               "always"):
+            with mock.patch.object(serializers, "read",
+                                   wraps=serializers.read) as load:
+                storage.close()
+        self.assertEqual(load.call_count, 1)
+
+
+class TestFileStorageUpdate(unittest.TestCase):
+    """Unittests for update of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_update(self):
+        """Test that update changes the object in place and saves it, only
+        if an attribute changed"""
+        storage = FileStorage()
+        city = City(name="Cairo", state_id="a")
+        city.save()
+        with mock.patch.object(file_storage, "write_atomic",
+                               wraps=file_storage.write_atomic) as write:
+            self.assertIs(storage.update(city, {"name": "Cairo"}), city)
+            self.assertEqual(write.call_count, 0)
+            storage.update(city, {"name": "Giza", "state_id": "b"})
+            self.assertEqual(write.call_count, 1)
+        self.assertIs(storage.get(City, city.id), city)
+        self.assertEqual(storage.related(City, "state_id", "b"), [city])
+        with open("file.json") as f:
+            self.assertEqual(json.load(f)["City." + city.id]["name"], "Giza")
+
+
+class TestFileStorageTransaction(unittest.TestCase):
+    """Unittests for the transactions of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_transaction_commits_once(self):
+        """Test that the saves of a transaction are written once, at its
+        end"""
+        storage = FileStorage()
+        old = State(name="old")
+        old.save()
+        with mock.patch.object(file_storage, "write_atomic",
+                               wraps=file_storage.write_atomic) as write:
+            with storage.transaction():
+                old.delete()
+                storage.save()
+                with storage.transaction():
+                    State(name="new").save()
+                self.assertEqual(write.call_count, 0)
+            self.assertEqual(write.call_count, 1)
+        with open("file.json") as f:
+            self.assertEqual([obj["name"] for obj in json.load(f).values()],
+                             ["new"])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_transaction_rolls_back(self):
+        """Test that an exception undoes the changes of the transaction"""
+        storage = FileStorage()
+        old, kept = State(name="old"), State(name="kept")
+        old.save()
+        kept.save()
+        replaced = State(id=kept.id, name="replaced")
+        with mock.patch.object(file_storage, "write_atomic",
+                               wraps=file_storage.write_atomic) as write:
+            with self.assertRaises(ValueError):
+                with storage.transaction():
+                    old.delete()
+                    storage.new(replaced)
+                    State(name="new").save()
+                    raise ValueError
+        self.assertEqual(write.call_count, 0)
+        self.assertEqual(sorted(state.name for state in
+                                storage.all(State).values()),
+                         ["kept", "old"])
+        self.assertIs(storage.get(State, kept.id), kept)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_transaction_rolls_back_attributes(self):
+        """Test that an exception undoes the attributes set in the
+        transaction, and leaves their objects as saved"""
+        state = State(name="a", tags=["x"])
+        state.save()
+        updated_at = state.updated_at
+        with self.assertRaises(ValueError):
+            with models.storage.transaction():
+                state.name = "b"
+                state.tags.append("y")
+                state.save()
+                raise ValueError
+        self.assertEqual(state.name, "a")
+        self.assertEqual(state.tags, ["x"])
+        self.assertEqual(state.updated_at, updated_at)
+        self.assertNotIn("State." + state.id,
+                         FileStorage._FileStorage__changed)
+        State(name="other").save()
+        with open("file.json") as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"], "a")
+
+
+class TestFileStorageBulk(unittest.TestCase):
+    """Unittests for bulk_new and bulk_delete of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_bulk_new_and_delete(self):
+        """Test that bulk_new and bulk_delete write the file once"""
+        storage = FileStorage()
+        states = [State(name=str(i)) for i in range(50)]
+        with mock.patch.object(file_storage, "write_atomic",
+                               wraps=file_storage.write_atomic) as write:
+            storage.bulk_new(states)
+            self.assertEqual(write.call_count, 1)
+            self.assertEqual(storage.bulk_delete(
+                State, [state.id for state in states[:10]] + ["12345"]), 10)
+            self.assertEqual(write.call_count, 2)
+        with open("file.json") as f:
+            self.assertEqual(sorted(json.load(f)),
+                             sorted("State." + state.id
+                                    for state in states[10:]))
+
+
+class TestFileStorageClassIndex(unittest.TestCase):
+    """Unittests for the per-class index of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_all_with_cls(self):
+        """Test that all with a class only returns objects of that class"""
+        storage = FileStorage()
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        self.assertEqual(storage.all(State), {"State." + state.id: state})
+        self.assertEqual(storage.all("City"), {"City." + city.id: city})
+        self.assertEqual(storage.all(Review), {})
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_all_with_cls_returns_copy(self):
+        """Test that mutating the result of all(cls) leaves storage intact"""
+        storage = FileStorage()
+        storage.new(State())
+        storage.all(State).clear()
+        self.assertEqual(storage.count(State), 1)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_index_follows_delete(self):
+        """Test that delete removes the object from the class index"""
+        storage = FileStorage()
+        state = State()
+        storage.new(state)
+        storage.new(State())
+        storage.delete(state)
+        self.assertEqual(storage.count(State), 1)
+        self.assertNotIn("State." + state.id, storage.all(State))
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_index_follows_replaced_objects(self):
+        """Test that the index is rebuilt when __objects is swapped out"""
+        storage = FileStorage()
+        storage.new(State())
+        user = User()
+        FileStorage._FileStorage__objects = {"User." + user.id: user}
+        self.assertEqual(storage.count(State), 0)
+        self.assertEqual(storage.all(User), {"User." + user.id: user})
+
+
+class TestFileStorageRelated(unittest.TestCase):
+    """Unittests for the foreign key indexes of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        self.save = models.storage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_related(self):
+        """Test that related returns the children of a parent id"""
+        state = State()
+        city = City(state_id=state.id)
+        other = City(state_id="other")
+        for obj in (state, city, other):
+            models.storage.new(obj)
+        self.assertEqual(models.storage.related(City, "state_id", state.id),
+                         [city])
+        self.assertEqual(state.cities, [city])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_search_places(self):
+        """Test search_places by states, cities and all amenities"""
+        wifi, pool = Amenity(), Amenity()
+        state = State()
+        cities = [City(state_id=state.id), City(state_id="other")]
+        both = Place(city_id=cities[0].id, amenity_ids=[wifi.id, pool.id])
+        one = Place(city_id=cities[1].id, amenity_ids=[wifi.id])
+        for obj in [wifi, pool, state, both, one] + cities:
+            models.storage.new(obj)
+        search = models.storage.search_places
+        self.assertCountEqual(search(), [both, one])
+        self.assertEqual(search(states=[state.id]), [both])
+        self.assertCountEqual(search([state.id], [cities[1].id]),
+                              [both, one])
+        self.assertEqual(search(amenities=[wifi.id, pool.id]), [both])
+        self.assertCountEqual(search(amenities=[wifi.id, "unknown"]),
+                              [both, one])
+        self.assertEqual(search(cities=[cities[1].id],
+                                amenities=[pool.id]), [])
+        self.assertEqual(search(states=["unknown"]), [])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_search_places_follows_amenity_links(self):
+        """Test that linking and unlinking amenities updates the amenity
+        index search_places uses instead of scanning the places"""
+        wifi = Amenity()
+        place = Place(city_id="a")
+        models.storage.new(wifi)
+        models.storage.new(place)
+        search = models.storage.search_places
+        self.assertEqual(search(amenities=[wifi.id]), [])
+        place.amenities = wifi
+        self.assertEqual(place.amenities, [wifi])
+        self.assertEqual(models.storage.related(Place, "amenity_ids",
+                                                wifi.id), [place])
+        with mock.patch.object(FileStorage, "all") as all:
+            self.assertEqual(search(amenities=[wifi.id]), [place])
+            self.assertEqual(search(cities=["a"], amenities=[wifi.id]),
+                             [place])
+        all.assert_not_called()
+        place.amenity_ids = []
+        self.assertEqual(search(amenities=[wifi.id]), [])
+        self.assertEqual(search(cities=["a"]), [place])
+        place.amenity_ids.append(wifi.id)
+        models.storage.new(place)
+        self.assertEqual(search(amenities=[wifi.id]), [place])
+        place.amenity_ids.remove(wifi.id)
+        with mock.patch.object(file_storage, "write_atomic") as write:
+            models.storage.save()
+        write.assert_called_once()
+        self.assertEqual(search(amenities=[wifi.id]), [])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_related_follows_attribute_update(self):
+        """Test that changing a foreign key moves the object in the index"""
+        place = Place(city_id="a", user_id="u")
+        models.storage.new(place)
+        place.city_id = "b"
+        self.assertEqual(models.storage.related(Place, "city_id", "a"), [])
+        self.assertEqual(models.storage.related(Place, "city_id", "b"),
+                         [place])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_related_follows_delete(self):
+        """Test that a deleted object is no longer related to its parent"""
+        review = Review(place_id="p", user_id="u")
+        models.storage.new(review)
+        models.storage.delete(review)
+        self.assertEqual(models.storage.related(Review, "place_id", "p"), [])
+        self.assertEqual(models.storage.related(Review, "user_id", "u"), [])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_related_unindexed_attribute(self):
+        """Test that related falls back to a scan for other attributes"""
+        state = State(name="Cairo")
+        models.storage.new(state)
+        self.assertEqual(models.storage.related(State, "name", "Cairo"),
+                         [state])
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """Unittests for the journal mode of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        for path in ("file.json", "file.json.log"):
+            try:
+                os.rename(path, path + ".tmp")
+            except IOError:
+                pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        self.patch = mock.patch.object(
+            FileStorage, "_FileStorage__journal_limit", 3)
+        self.patch.start()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.patch.stop()
+        FileStorage._FileStorage__objects = self.save
+        for path in ("file.json", "file.json.log"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+            try:
+                os.rename(path + ".tmp", path)
+            except IOError:
+                pass
+
+    def journal(self):
+        """returns the records of the journal"""
+        with open("file.json.log", "r") as f:
+            return [json.loads(line) for line in f]
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_appends_changes(self):
+        """Test that save only appends the changed objects"""
+        storage = FileStorage()
+        storage.new(State())
+        storage.save()
+        with open("file.json", "r") as f:
+            snapshot = f.read()
+        state = State(name="Cairo")
+        storage.new(state)
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(f.read(), snapshot)
+        self.assertEqual(self.journal(),
+                         [{"op": "set", "key": "State." + state.id,
+                           "obj": state.to_dict()}])
+        storage.delete(state)
+        storage.save()
+        self.assertEqual(self.journal()[1],
+                         {"op": "delete", "key": "State." + state.id})
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_replays_journal(self):
+        """Test that reload applies the journal on top of the JSON file"""
+        storage = FileStorage()
+        kept = State(name="Kept")
+        gone = State()
+        storage.new(kept)
+        storage.new(gone)
+        storage.save()
+        kept.name = "Renamed"
+        storage.delete(gone)
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(list(storage.all().keys()), ["State." + kept.id])
+        self.assertEqual(storage.all()["State." + kept.id].name, "Renamed")
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_ignores_torn_record(self):
+        """Test that an incomplete last journal record is ignored, and that
+        what is saved after it is not lost"""
+        storage = FileStorage()
+        state = State()
+        storage.new(state)
+        storage.save()
+        storage.new(City())
+        storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('{"op": "set", "key": "Ci')
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(storage.count(), 2)
+        storage.new(Amenity())
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(storage.count(), 3)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_compacts_journal(self):
+        """Test that the journal is folded into the JSON file at the limit"""
+        storage = FileStorage()
+        storage.save()
+        for i in range(4):
+            storage.new(State())
+            storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+        with open("file.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 4)
+
+
+class TestFileStorageIncrementalSave(unittest.TestCase):
+    """Unittests for the incremental, atomic save of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_only_serializes_changed_objects(self):
+        """Test that save does not serialize unchanged objects again"""
+        storage = FileStorage()
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            storage.new(state)
+        storage.save()
+        with mock.patch.object(BaseModel, "to_dict", autospec=True,
+                               side_effect=BaseModel.to_dict) as to_dict:
+            states[0].name = "changed"
+            storage.new(City())
+            storage.delete(states[1])
+            storage.save()
+        self.assertEqual(to_dict.call_count, 2)
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js, {key: value.to_dict() for key, value
+                              in storage.all().items()})
+        self.assertEqual(js["State." + states[0].id]["name"], "changed")
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_finds_lists_changed_in_place(self):
+        """Test that save writes a list attribute changed in place"""
+        storage = FileStorage()
+        place = Place(amenity_ids=[])
+        amenity = Amenity()
+        storage.new(place)
+        storage.new(amenity)
+        storage.save()
+        place.amenity_ids.append(amenity.id)
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["Place." + place.id]["amenity_ids"],
+                         [amenity.id])
+        with mock.patch.object(BaseModel, "to_dict", autospec=True,
+                               side_effect=BaseModel.to_dict) as to_dict:
+            storage.save()
+        self.assertEqual(to_dict.call_count, 0)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_is_atomic(self):
+        """Test that a failed save leaves the previous file.json intact"""
+        storage = FileStorage()
+        storage.new(State())
+        storage.save()
+        with open("file.json", "r") as f:
+            before = f.read()
+        storage.new(State())
+        with mock.patch.object(os, "fsync", side_effect=OSError):
+            self.assertRaises(OSError, storage.save)
+        with open("file.json", "r") as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual([name for name in os.listdir(".")
+                          if name.startswith("file.json.") and
+                          name != "file.json.lock"], [])
+
+
+class TestFileStorageWriteBehind(unittest.TestCase):
+    """Unittests for the write-behind mode of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        self.patches = [
+            mock.patch.object(FileStorage, "_FileStorage__write_behind", 60),
+            mock.patch.object(FileStorage, "_FileStorage__write_batch", 3)]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage().flush()
+        for patch in self.patches:
+            patch.stop()
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_is_deferred_until_flush(self):
+        """Test that save does not write and flush writes synchronously"""
+        storage = FileStorage()
+        state = State()
+        storage.new(state)
+        storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        storage.flush()
+        with open("file.json", "r") as f:
+            self.assertIn("State." + state.id, json.load(f))
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_batch_wakes_flusher(self):
+        """Test that a full batch of saves is written in the background"""
+        storage = FileStorage()
+        for i in range(3):
+            storage.new(State())
+            storage.save()
+        for i in range(100):
+            if os.path.exists("file.json"):
+                break
+            time.sleep(0.05)
+        with open("file.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+
+class TestFileStorageThreads(unittest.TestCase):
+    """Unittests for concurrent use of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_readers_and_writers(self):
+        """Test that reading and saving while others write does not fail"""
+        storage = FileStorage()
+        errors = []
+
+        def work(job):
+            """runs job 200 times, recording any exception"""
+            try:
+                for i in range(200):
+                    job()
+            except Exception as e:
+                errors.append(e)
+
+        def write():
+            """adds and deletes a state"""
+            state = State()
+            storage.new(state)
+            storage.delete(state)
+            storage.new(State())
+
+        jobs = [write, write, storage.save, lambda: storage.all(State),
+                lambda: storage.count(State)]
+        threads = [threading.Thread(target=work, args=(job,))
+                   for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(storage.count(State), 400)
+
+
+class TestFileStorageProcesses(unittest.TestCase):
+    """Unittests for file storage shared by several processes"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def other_process(self, code):
+        """runs code in another python process using file storage"""
+        env = dict(os.environ)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        return subprocess.run(
+            [sys.executable, "-c", "import models\n" + code], env=env,
+            check=True, stdout=subprocess.PIPE).stdout.decode().strip()
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_keeps_other_process_writes(self):
+        """Test that save merges in what another process wrote"""
+        storage = FileStorage()
+        mine = State(name="mine")
+        storage.new(mine)
+        storage.save()
+        gone = State(name="gone")
+        storage.new(gone)
+        storage.save()
+        with open("file.json.lock", "r") as f:
+            generation = int(f.read())
+        other_id = self.other_process(
+            "from models.state import State\n"
+            "models.storage.all()['State.{}'].delete()\n"
+            "state = State(name='other')\n"
+            "state.save()\n"
+            "print(state.id)".format(gone.id))
+        storage.new(State(name="mine too"))
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(sorted(value["name"] for value in js.values()),
+                         ["mine", "mine too", "other"])
+        self.assertIn("State." + other_id, storage.all())
+        self.assertNotIn("State." + gone.id, storage.all())
+        with open("file.json.lock", "r") as f:
+            self.assertEqual(int(f.read()), generation + 2)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_first_save_keeps_other_process_writes(self):
+        """Test that the first save after a reload that found no file
+        merges in what another process wrote since"""
+        storage = FileStorage()
+        storage.reload()
+        self.other_process("from models.state import State\n"
+                           "State(name='other').save()")
+        storage.new(State(name="mine"))
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(sorted(value["name"] for value in js.values()),
+                         ["mine", "other"])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_keeps_unsaved_changes(self):
+        """Test that reload does not undo changes not saved yet"""
+        storage = FileStorage()
+        state = State(name="mine")
+        storage.new(state)
+        storage.save()
+        state.name = "unsaved"
+        self.other_process("from models.state import State\n"
+                           "State(name='other').save()")
+        storage.reload()
+        self.assertEqual(storage.count(State), 2)
+        self.assertEqual(storage.all()["State." + state.id].name, "unsaved")
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Unittests for the lazy mode of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        self.patch = mock.patch.object(FileStorage, "_FileStorage__lazy",
+                                       True)
+        self.patch.start()
+        self.storage = FileStorage()
+        self.state = State(name="Cairo")
+        self.city = City(name="Giza", state_id=self.state.id)
+        self.storage.new(self.state)
+        self.storage.new(self.city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        self.patch.stop()
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def loaded(self):
+        """returns the keys whose objects were built"""
+        return sorted(key for key, value
+                      in FileStorage._FileStorage__objects.items()
+                      if isinstance(value, BaseModel))
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_builds_no_object(self):
+        """Test that reload keeps the records without building objects"""
+        with mock.patch.object(BaseModel, "__init__") as init:
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+        self.assertEqual(init.call_count, 0)
+        self.assertEqual(self.loaded(), [])
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(City), 1)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_is_faster_than_eager(self):
+        """Test that reload neither indexes the records nor copies their
+        lists, and that it takes well under the time of an eager reload"""
+        for i in range(3000):
+            self.storage.new(Place(name=str(i), city_id=self.city.id,
+                                   amenity_ids=[self.state.id]))
+        self.storage.save()
+        link = mock.patch.object(FileStorage, "_FileStorage__link",
+                                 side_effect=AssertionError)
+        with link:
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+        self.assertEqual(self.storage.count(Place), 3000)
+
+        def reload_time():
+            """returns the best time of a few reloads from scratch"""
+            times = []
+            for i in range(3):
+                FileStorage._FileStorage__objects = {}
+                start = time.perf_counter()
+                self.storage.reload()
+                times.append(time.perf_counter() - start)
+            return min(times)
+        lazy = reload_time()
+        with mock.patch.object(FileStorage, "_FileStorage__lazy", False):
+            eager = reload_time()
+        self.assertLess(lazy, eager * 0.7)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_get_builds_one_object(self):
+        """Test that get only builds the object looked up"""
+        state = self.storage.get(State, self.state.id)
+        self.assertIsInstance(state, State)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+        self.assertIs(self.storage.get(State, self.state.id), state)
+        self.assertEqual(self.loaded(), ["State." + self.state.id])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_lookups_build_objects(self):
+        """Test that all and related return built objects"""
+        cities = self.storage.related(City, "state_id", self.state.id)
+        self.assertEqual([city.name for city in cities], ["Giza"])
+        self.assertIsInstance(self.storage.all(State)["State." +
+                                                      self.state.id], State)
+        for value in self.storage.all().values():
+            self.assertIsInstance(value, BaseModel)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_keeps_records(self):
+        """Test that save writes back the records never looked up"""
+        self.storage.new(State(name="Alex"))
+        self.storage.compact()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["City." + self.city.id], self.city.to_dict())
+        self.assertEqual(len(js), 3)
+
+
+class TestFileStorageShards(unittest.TestCase):
+    """Unittests for the sharded layout of file storage module"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json.d", "tmp.d")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        self.patches = [
+            mock.patch.object(FileStorage, "_FileStorage__sharded", True),
+            mock.patch.object(FileStorage, "_FileStorage__shards_fresh",
+                              set()),
+            mock.patch.object(FileStorage, "_FileStorage__shards_seen",
+                              set())]
+        for patch in self.patches:
+            patch.start()
+        self.storage = FileStorage()
+        self.state = State(name="Cairo")
+        self.city = City(name="Giza", state_id=self.state.id)
+        self.storage.new(self.state)
+        self.storage.new(self.city)
+        self.storage.save()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        for patch in self.patches:
+            patch.stop()
+        FileStorage._FileStorage__objects = self.save
+        shutil.rmtree("file.json.d", ignore_errors=True)
+        try:
+            os.rename("tmp.d", "file.json.d")
+        except IOError:
+            pass
+
+    def shard(self, name):
+        """returns the records of the shard file name"""
+        with open(os.path.join("file.json.d", name + ".json"), "r") as f:
+            return json.load(f)
+
+    def restart(self):
+        """forgets the objects, as a new process would"""
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_one_file_per_class(self):
+        """Test that save writes the objects of each class to its file"""
+        self.assertEqual(sorted(os.listdir("file.json.d")),
+                         ["City.json", "State.json"])
+        self.assertEqual(self.shard("City"),
+                         {"City." + self.city.id: self.city.to_dict()})
+        self.assertEqual(self.shard("State"),
+                         {"State." + self.state.id: self.state.to_dict()})
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_rewrites_dirty_shards(self):
+        """Test that save only rewrites the files of changed objects"""
+        inodes = {name: os.stat(os.path.join("file.json.d", name)).st_ino
+                  for name in os.listdir("file.json.d")}
+        self.city.name = "Alexandria"
+        self.storage.save()
+        self.assertEqual(os.stat("file.json.d/State.json").st_ino,
+                         inodes["State.json"])
+        self.assertNotEqual(os.stat("file.json.d/City.json").st_ino,
+                            inodes["City.json"])
+        self.assertEqual(self.shard("City")["City." + self.city.id]["name"],
+                         "Alexandria")
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_delete_removes_empty_shard(self):
+        """Test that the file of a class without objects is removed"""
+        self.storage.delete(self.city)
+        self.storage.save()
+        self.assertEqual(os.listdir("file.json.d"), ["State.json"])
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_reads_shards_lazily(self):
+        """Test that the file of a class is only read when it is looked
+        up"""
+        self.restart()
+        with mock.patch.object(serializers, "read",
+                               wraps=serializers.read) as read:
+            self.assertEqual(read.call_count, 0)
+            self.assertEqual(list(self.storage.all(State)),
+                             ["State." + self.state.id])
+            self.assertEqual(read.call_count, 1)
+            self.assertEqual(self.storage.get(State, self.state.id).name,
+                             "Cairo")
+            self.assertEqual(self.storage.count(), 2)
+            self.assertEqual(read.call_count, 2)
+            self.storage.all()
+            self.assertEqual(read.call_count, 2)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_keeps_unread_shards(self):
+        """Test that save does not lose the classes it did not read"""
+        self.restart()
+        self.storage.new(State(name="Alex"))
+        self.storage.save()
+        self.assertEqual(len(self.shard("State")), 2)
+        self.assertEqual(len(self.shard("City")), 1)
+        self.storage.compact()
+        self.assertEqual(len(self.shard("City")), 1)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_id_prefix(self):
+        """Test that get only reads the file of the id prefix"""
+        with mock.patch.object(FileStorage, "_FileStorage__shard_prefix",
+                               1):
+            states = [State(name=str(i)) for i in range(30)]
+            for state in states:
+                self.storage.new(state)
+            self.storage.compact()
+            names = os.listdir("file.json.d")
+            self.assertIn("State.{}.json".format(states[0].id[0]), names)
+            self.assertIn("City.{}.json".format(self.city.id[0]), names)
+            self.assertEqual(len(self.shard("State." + states[0].id[0])),
+                             len([state for state in states + [self.state]
+                                  if state.id[0] == states[0].id[0]]))
+            self.restart()
+            with mock.patch.object(serializers, "read",
+                                   wraps=serializers.read) as read:
+                self.assertEqual(self.storage.get(State, states[0].id).name,
+                                 "0")
+                self.assertEqual(read.call_count, 1)
+                self.assertEqual(self.storage.count(State), 31)
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_reload_sees_other_process(self):
+        """Test that reload picks up what another process wrote"""
+        self.storage.all(City)
+        env = dict(os.environ, HBNB_FILE_SHARDED="1")
+        env.pop("HBNB_TYPE_STORAGE", None)
+        subprocess.run(
+            [sys.executable, "-c",
+             "import models\n"
+             "from models.state import State\n"
+             "models.storage.all()['City.{}'].delete()\n"
+             "State(name='other').save()".format(self.city.id)],
+            env=env, check=True)
+        self.storage.reload()
+        self.assertEqual(self.storage.all(City), {})
+        self.assertEqual(sorted(state.name for state in
+                                self.storage.all(State).values()),
+                         ["Cairo", "other"])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""
+Contains the TestReadWriteLockDocs and TestReadWriteLock classes
+"""
+
+import inspect
+from models.engine import locks
+import pep8
+import threading
+import time
+import unittest
+ReadWriteLock = locks.ReadWriteLock
+
+
+class TestReadWriteLockDocs(unittest.TestCase):
+    """Tests to check the documentation and style of ReadWriteLock class"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.rw_f = inspect.getmembers(ReadWriteLock, inspect.isfunction)
+
+    def test_pep8_conformance_locks(self):
+        """Test that models/engine/locks.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/locks.py',
+                                    'tests/test_models/test_engine/\
+test_locks.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_locks_module_docstring(self):
+        """Test for the locks.py module docstring"""
+        self.assertIsNot(locks.__doc__, None,
+                         "locks.py needs a docstring")
+        self.assertTrue(len(locks.__doc__) >= 1,
+                        "locks.py needs a docstring")
+
+    def test_rw_func_docstrings(self):
+        """Test for the presence of docstrings in ReadWriteLock methods"""
+        for func in self.rw_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestReadWriteLock(unittest.TestCase):
+    """Test the ReadWriteLock class"""
+
+    def run_thread(self, target):
+        """runs target in a thread, returns whether it finished in time"""
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(0.5)
+        return not thread.is_alive()
+
+    def test_readers_share_the_lock(self):
+        """Test that a second thread can read while the lock is read"""
+        lock = ReadWriteLock()
+        with lock.read():
+            self.assertTrue(self.run_thread(lambda: lock.read().__enter__()))
+
+    def test_writer_excludes_readers(self):
+        """Test that a reader waits for the writer to be done"""
+        lock = ReadWriteLock()
+        seen = []
+
+        def reader():
+            """reads once the writer is done"""
+            with lock.read():
+                seen.append("read")
+
+        with lock.write():
+            thread = threading.Thread(target=reader, daemon=True)
+            thread.start()
+            time.sleep(0.05)
+            seen.append("written")
+        thread.join(0.5)
+        self.assertEqual(seen, ["written", "read"])
+
+    def test_reader_excludes_writer(self):
+        """Test that a writer waits for the readers to be done"""
+        lock = ReadWriteLock()
+        with lock.read():
+            self.assertFalse(self.run_thread(
+                lambda: lock.write().__enter__()))
+
+    def test_reentrant(self):
+        """Test that both sides are reentrant and a writer may read"""
+        lock = ReadWriteLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                pass
+        self.assertTrue(self.run_thread(lambda: lock.write().__enter__()))
+
+    def test_no_upgrade(self):
+        """Test that a reader cannot take the lock for writing"""
+        lock = ReadWriteLock()
+        with lock.read():
+            self.assertRaises(RuntimeError, lock.acquire_write)
+
+
+if __name__ == "__main__":
+    unittest.main()
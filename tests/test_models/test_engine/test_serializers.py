@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+"""
+Contains the TestSerializersDocs and TestSerializers classes
+"""
+
+import inspect
+import io
+import json
+import models
+from models.engine import serializers
+from models.engine.file_storage import FileStorage
+from models.state import State
+import os
+import pep8
+import pickle
+import unittest
+from unittest import mock
+formats = serializers.formats
+records = {"State.1": {"__class__": "State", "id": "1", "name": "Cairo"},
+           "Place.2": {"__class__": "Place", "id": "2", "latitude": 1.5,
+                       "amenity_ids": ["a", "b"], "description": None}}
+
+
+class TestSerializersDocs(unittest.TestCase):
+    """Tests to check the documentation and style of serializers module"""
+
+    def test_pep8_conformance_serializers(self):
+        """Test that models/engine/serializers.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/serializers.py',
+                                    'tests/test_models/test_engine/\
+test_serializers.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_serializers_module_docstring(self):
+        """Test for the serializers.py module docstring"""
+        self.assertIsNot(serializers.__doc__, None,
+                         "serializers.py needs a docstring")
+        self.assertTrue(len(serializers.__doc__) >= 1,
+                        "serializers.py needs a docstring")
+
+    def test_serializers_docstrings(self):
+        """Test for the presence of docstrings in the formats"""
+        for fmt in formats.values():
+            for name, func in inspect.getmembers(fmt, inspect.isroutine):
+                if name.startswith("__"):
+                    continue
+                with self.subTest(fmt=fmt, name=name):
+                    self.assertTrue(len(func.__doc__) >= 1)
+
+
+class TestSerializers(unittest.TestCase):
+    """Test the formats of serializers module"""
+
+    def dump(self, fmt):
+        """returns records written in the format fmt"""
+        return fmt.dump((key, fmt.encode(record))
+                        for key, record in records.items())
+
+    def test_round_trip(self):
+        """Test that every format reads back what it wrote"""
+        for name, fmt in formats.items():
+            with self.subTest(name=name):
+                data = self.dump(fmt)
+                self.assertIs(serializers.detect(data), fmt)
+                self.assertEqual(fmt.load(data), records)
+
+    def test_json_is_plain_json(self):
+        """Test that the json format is the historical file.json layout"""
+        self.assertEqual(json.loads(self.dump(serializers.JSONFormat)),
+                         records)
+        self.assertEqual(serializers.JSONFormat.dump([]), b"{}")
+
+    def test_pickle_refuses_classes(self):
+        """Test that a pickle referring to a class is not loaded"""
+        fmt = serializers.PickleFormat
+        data = fmt.dump([("State.1", pickle.dumps(mock.sentinel.x))])
+        self.assertRaises(pickle.UnpicklingError, fmt.load, data)
+
+    def test_zlib_is_compressed(self):
+        """Test that the zlib format is smaller than the pickle one"""
+        many = [("State.{}".format(i), serializers.PickleFormat.encode(
+            records["State.1"])) for i in range(100)]
+        self.assertLess(len(serializers.ZlibFormat.dump(many)),
+                        len(serializers.PickleFormat.dump(many)) / 4)
+
+    def test_read_streams(self):
+        """Test that read() yields the first record before reading the
+        whole file"""
+        many = {"State.{}".format(i): dict(records["State.1"], id=str(i))
+                for i in range(5000)}
+        for name, fmt in formats.items():
+            with self.subTest(name=name), \
+                    mock.patch.object(serializers._Scanner, "chunk_size",
+                                      1024):
+                f = io.BytesIO(fmt.dump((key, fmt.encode(record))
+                                        for key, record in many.items()))
+                items = serializers.read(f)
+                self.assertEqual(next(items), ("State.0", many["State.0"]))
+                self.assertLess(f.tell(), len(f.getvalue()) / 2)
+                self.assertEqual(dict(items, **{"State.0": many["State.0"]}),
+                                 many)
+
+    def test_json_read_any_layout(self):
+        """Test that the JSON reader accepts any whitespace and characters
+        split between two chunks"""
+        data = {"State.1": {"name": "Caf\u00e9 " * 10, "n": [1, 2.5]},
+                "State.2": {}}
+        for indent in (None, 4):
+            with self.subTest(indent=indent), \
+                    mock.patch.object(serializers._Scanner, "chunk_size", 3):
+                f = io.BytesIO(json.dumps(data, indent=indent,
+                                          ensure_ascii=False).encode())
+                self.assertEqual(dict(serializers.JSONFormat.read(f)), data)
+        for bad in (b"", b"{", b'{"State.1": {}', b'{"State.1" {}}'):
+            with self.subTest(bad=bad):
+                self.assertRaises(ValueError, serializers.JSONFormat.load,
+                                  bad)
+
+    def test_convert(self):
+        """Test that convert rewrites a file in another format"""
+        path = "test_convert.json"
+        try:
+            with open(path, "wb") as f:
+                f.write(self.dump(serializers.JSONFormat))
+            self.assertEqual(serializers.convert("zlib", path), 2)
+            with open(path, "rb") as f:
+                data = f.read()
+            self.assertIs(serializers.detect(data), serializers.ZlibFormat)
+            self.assertEqual(serializers.ZlibFormat.load(data), records)
+        finally:
+            for name in (path, path + ".lock"):
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
+
+
+class TestFileStorageFormats(unittest.TestCase):
+    """Test the formats through the FileStorage class"""
+
+    def setUp(self):
+        """Set up test methods"""
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        self.save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tear down test methods"""
+        FileStorage._FileStorage__objects = self.save
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    @unittest.skipIf(models.storage_t in ('db', 'sqlite'),
+                     "not testing file storage")
+    def test_save_and_detect(self):
+        """Test that the file is written in the format and read back by
+        detecting it"""
+        storage = FileStorage()
+        state = State(name="Cairo")
+        storage.new(state)
+        for name, fmt in formats.items():
+            with self.subTest(name=name):
+                with mock.patch.object(FileStorage, "_FileStorage__format",
+                                       fmt):
+                    storage.compact()
+                with open("file.json", "rb") as f:
+                    self.assertIs(serializers.detect(f.read()), fmt)
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                self.assertEqual(storage.all()["State." + state.id].to_dict(),
+                                 state.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+import inspect
+import models
+from models.engine import sqlite_storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+import os
+import pep8
+import sqlite3
+import subprocess
+import sys
+import unittest
+from unittest import mock
+SQLiteStorage = sqlite_storage.SQLiteStorage
+classes = {"Amenity": Amenity, "City": City, "Place": Place,
+           "Review": Review, "State": State, "User": User}
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.sqs_f = inspect.getmembers(SQLiteStorage, inspect.isfunction)
+
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_sqlite_storage(self):
+        """Test tests/test_models/test_sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_sqlite_storage_module_docstring(self):
+        """Test for the sqlite_storage.py module docstring"""
+        self.assertIsNot(sqlite_storage.__doc__, None,
+                         "sqlite_storage.py needs a docstring")
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1,
+                        "sqlite_storage.py needs a docstring")
+
+    def test_sqlite_storage_class_docstring(self):
+        """Test for the SQLiteStorage class docstring"""
+        self.assertIsNot(SQLiteStorage.__doc__, None,
+                         "SQLiteStorage class needs a docstring")
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1,
+                        "SQLiteStorage class needs a docstring")
+
+    def test_sqs_func_docstrings(self):
+        """Test for the presence of docstrings in SQLiteStorage methods"""
+        for func in self.sqs_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """Test the SQLiteStorage class on a database of its own"""
+
+    def setUp(self):
+        """Set up test methods"""
+        with mock.patch.dict(os.environ, {"HBNB_SQLITE_DB": "test_hbnb.db"}):
+            self.storage = SQLiteStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """Tear down test methods"""
+        for ext in ("", "-wal", "-shm"):
+            try:
+                os.remove("test_hbnb.db" + ext)
+            except OSError:
+                pass
+
+    def add(self, *objs):
+        """adds and saves objs"""
+        for obj in objs:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def test_schema(self):
+        """Test that the tables and foreign key indexes are created"""
+        conn = sqlite3.connect("test_hbnb.db")
+        names = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master")}
+        conn.close()
+        self.assertTrue({"states", "cities", "places", "cities_state_id",
+                         "places_city_id", "reviews_place_id"} <= names)
+
+    def test_all_and_count(self):
+        """Test all and count with and without a class"""
+        objs = [cls() for cls in classes.values()]
+        self.add(*objs)
+        self.assertEqual(len(self.storage.all()), 6)
+        self.assertEqual(self.storage.count(), 6)
+        for obj in objs:
+            with self.subTest(cls=obj.__class__):
+                key = obj.__class__.__name__ + "." + obj.id
+                self.assertEqual(self.storage.all(obj.__class__),
+                                 {key: obj})
+                self.assertEqual(self.storage.count(obj.__class__), 1)
+
+    def test_counts(self):
+        """Test counts of every class, saved or not"""
+        self.add(State(), City(), City())
+        counts = dict.fromkeys(sqlite_storage.classes, 0)
+        counts.update(State=1, City=2)
+        self.assertEqual(self.storage.counts(), counts)
+        self.storage.new(User())
+        counts["User"] = 1
+        self.assertEqual(self.storage.counts(), counts)
+
+    def test_page_and_iter(self):
+        """Test keyset pagination and iteration in id order, including the
+        changes not saved yet"""
+        states = sorted((State() for i in range(6)), key=lambda s: s.id)
+        self.add(*states[:5])
+        self.storage.close()
+        ids = [state.id for state in states]
+        self.assertEqual([state.id for state in
+                          self.storage.page(State, limit=2)], ids[:2])
+        self.storage.delete(self.storage.get(State, ids[3]))
+        self.storage.new(states[5])
+        self.assertEqual([state.id for state in
+                          self.storage.page(State, ids[1], 3)],
+                         [ids[2], ids[4], ids[5]])
+        self.assertEqual([state.id for state in
+                          self.storage.iter(State, batch_size=2)],
+                         ids[:3] + ids[4:])
+
+    def test_unsaved_changes(self):
+        """Test that lookups see the changes not saved yet"""
+        state = State(name="Cairo")
+        self.storage.new(state)
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.storage.save()
+        self.storage.delete(state)
+        self.assertEqual(self.storage.all(State), {})
+        self.assertIsNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.count(State), 0)
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.count(State), 0)
+
+    def test_get(self):
+        """Test get from the database after close"""
+        state = State(name="Cairo")
+        self.add(state)
+        self.storage.close()
+        got = self.storage.get(State, state.id)
+        self.assertIsNot(got, state)
+        self.assertEqual(got.to_dict(), state.to_dict())
+        self.assertIs(self.storage.get(State, state.id), got)
+        self.assertIsNone(self.storage.get(State, "12345"))
+        self.assertIsNone(self.storage.get(City, state.id))
+
+    @unittest.skipIf(models.storage_t == 'db',
+                     "SQLiteStorage does not read back the db models")
+    def test_user_password_round_trip(self):
+        """Test that reading a user back does not hash its password again"""
+        user = User(email="a@b.c", password="pwd")
+        self.add(user)
+        hashed = user.password
+        self.storage.close()
+        got = self.storage.get(User, user.id)
+        self.assertIsNot(got, user)
+        self.assertEqual(got.password, hashed)
+        got.first_name = "Bob"
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(User, user.id).password, hashed)
+
+    def test_related(self):
+        """Test related through the foreign key columns"""
+        cairo = State(name="Cairo")
+        giza = State(name="Giza")
+        cities = [City(name=str(i), state_id=cairo.id) for i in range(3)]
+        self.add(cairo, giza, *cities)
+        self.storage.close()
+        self.assertEqual(sorted(city.name for city in
+                                self.storage.related(City, "state_id",
+                                                     cairo.id)),
+                         ["0", "1", "2"])
+        moved = self.storage.get(City, cities[0].id)
+        moved.state_id = giza.id
+        self.storage.new(moved)
+        self.assertEqual([city.name for city in
+                          self.storage.related(City, "state_id", giza.id)],
+                         ["0"])
+        self.assertEqual(len(self.storage.related(City, "state_id",
+                                                  cairo.id)), 2)
+        self.assertEqual([city.name for city in
+                          self.storage.related(City, "name", "1")], ["1"])
+
+    def test_search_places(self):
+        """Test search_places by states, cities and all amenities"""
+        wifi, pool = Amenity(), Amenity()
+        state = State()
+        cities = [City(state_id=state.id), City(state_id="other")]
+        both = Place(city_id=cities[0].id, amenity_ids=[wifi.id, pool.id])
+        one = Place(city_id=cities[1].id, amenity_ids=[wifi.id])
+        self.add(wifi, pool, state, both, one, *cities)
+        search = self.storage.search_places
+        self.assertCountEqual(search(), [both, one])
+        self.assertEqual(search(states=[state.id]), [both])
+        self.assertEqual(search(amenities=[wifi.id, pool.id]), [both])
+        self.assertCountEqual(search(amenities=[wifi.id, "unknown"]),
+                              [both, one])
+
+    def test_bulk_new_and_delete(self):
+        """Test bulk_new and bulk_delete"""
+        states = [State(name=str(i)) for i in range(50)]
+        self.storage.bulk_new(states)
+        self.storage.close()
+        self.assertEqual(self.storage.count(State), 50)
+        self.assertEqual(self.storage.bulk_delete(
+            State, [state.id for state in states[:10]] + ["12345"]), 10)
+        self.storage.close()
+        self.assertEqual(sorted(self.storage.all(State)),
+                         sorted("State." + state.id for state in states[10:]))
+
+    def test_transaction(self):
+        """Test that a transaction saves once at its end, or forgets its
+        changes on an exception"""
+        old = State(name="old")
+        self.add(old)
+        with self.storage.transaction():
+            self.storage.delete(old)
+            self.storage.save()
+            self.storage.new(State(name="new"))
+            self.assertEqual(self.storage.count(State), 1)
+            with sqlite3.connect("test_hbnb.db") as conn:
+                self.assertEqual(conn.execute(
+                    "SELECT COUNT(*) FROM states").fetchone()[0], 1)
+        self.storage.close()
+        self.assertEqual([state.name for state in
+                          self.storage.all(State).values()], ["new"])
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                self.storage.new(State(name="rolled back"))
+                self.storage.save()
+                raise ValueError
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_update(self):
+        """Test that update changes the object in place and saves it"""
+        city = City(name="Cairo", state_id="a")
+        self.add(city)
+        self.assertIs(self.storage.update(
+            city, {"name": "Giza", "state_id": "b"}), city)
+        self.storage.close()
+        self.assertEqual([c.name for c in
+                          self.storage.related(City, "state_id", "b")],
+                         ["Giza"])
+
+    def test_other_process(self):
+        """Test that what another process saved is seen"""
+        env = dict(os.environ, HBNB_TYPE_STORAGE="sqlite",
+                   HBNB_SQLITE_DB="test_hbnb.db")
+        env.pop("HBNB_ENV", None)
+        subprocess.run(
+            [sys.executable, "-c", "import models\n"
+             "from models.state import State\n"
+             "State(name='other').save()"], env=env, check=True)
+        self.assertEqual([state.name for state in
+                          self.storage.all(State).values()], ["other"])
+
+
+class TestSQLiteStorageGlobal(unittest.TestCase):
+    """Test models.storage when it is a SQLiteStorage"""
+
+    @unittest.skipIf(models.storage_t != 'sqlite', "not testing sqlite")
+    def test_save_through_models(self):
+        """Test that changes made on objects are saved"""
+        state = State(name="Cairo")
+        state.save()
+        state.name = "Alexandria"
+        models.storage.save()
+        models.storage.close()
+        self.assertEqual(models.storage.get(State, state.id).name,
+                         "Alexandria")
+        city = City(name="Giza", state_id=state.id)
+        city.save()
+        self.assertEqual(models.storage.get(State, state.id).cities, [city])
+        city.delete()
+        state.delete()
+        models.storage.save()
+
+    @unittest.skipIf(models.storage_t != 'sqlite', "not testing sqlite")
+    def test_transaction_rolls_back_attributes(self):
+        """Test that an exception undoes the attributes set in the
+        transaction, which are not saved afterwards"""
+        state = State(name="a")
+        state.save()
+        with self.assertRaises(ValueError):
+            with models.storage.transaction():
+                state.name = "b"
+                state.save()
+                raise ValueError
+        self.assertEqual(state.name, "a")
+        models.storage.save()
+        models.storage.close()
+        self.assertEqual(models.storage.get(State, state.id).name, "a")
+        state.delete()
+        models.storage.save()
+
+
+if __name__ == "__main__":
+    unittest.main()